@@ -0,0 +1,113 @@
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, params
+
+
+class SpaceSaving:
+    """Streaming top-k counter (Metwally et al.) using at most `capacity` counters.
+
+    When a new item arrives and all counters are taken, it replaces the smallest counter and
+    inherits its count, so heavy hitters are never missed and counts are overestimated by at most
+    the recorded error.
+    """
+
+    def __init__(self, capacity: int = 100):
+        assert capacity > 0, 'capacity must be positive'
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, item: str, weight: int = 1) -> None:
+        if item in self.counts:
+            self.counts[item] += weight
+            return
+        error = 0
+        if len(self.counts) >= self.capacity:
+            smallest = min(self.counts, key=self.counts.__getitem__)
+            error = self.counts.pop(smallest)
+            self.errors.pop(smallest, None)
+        self.counts[item] = error + weight
+        self.errors[item] = error
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class LargestItems:
+    """Keeps the `capacity` largest items seen, with their latest size."""
+
+    def __init__(self, capacity: int = 100):
+        assert capacity > 0, 'capacity must be positive'
+        self.capacity = capacity
+        self.sizes: Dict[str, int] = {}
+
+    def add(self, item: str, size: int) -> None:
+        self.sizes[item] = size
+        if len(self.sizes) > self.capacity:
+            del self.sizes[min(self.sizes, key=self.sizes.__getitem__)]
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return sorted(self.sizes.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class CacheAnalytics:
+    """Samples cache lookups and stores to find the hottest keys, the largest entries and the worst policies.
+
+    Only a `sample_rate` share of events is recorded, so the overhead on the request path stays
+    small and the reported counts are estimates scaled down by the sample rate.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, capacity: int = 100):
+        assert 0 < sample_rate <= 1, 'sample_rate must be in (0, 1]'
+        self.sample_rate = sample_rate
+        self.hot_keys = SpaceSaving(capacity)
+        self.big_keys = LargestItems(capacity)
+        self.policies: Dict[str, List[int]] = {}
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record_lookup(self, policy: str, key: str, size: Optional[int]) -> None:
+        """Record a lookup of `key`, with the entry size on a hit or None on a miss."""
+        if not self._sampled():
+            return
+        self.hot_keys.add(key)
+        counters = self.policies.setdefault(policy, [0, 0])
+        counters[0 if size is not None else 1] += 1
+        if size is not None:
+            self.big_keys.add(key, size)
+
+    def record_store(self, key: str, size: int) -> None:
+        if self._sampled():
+            self.big_keys.add(key, size)
+
+    def report(self, n: int = 10) -> Dict[str, Any]:
+        policies = sorted(self.policies.items(), key=lambda item: item[1][0] / sum(item[1]))
+        return {
+            'sample_rate': self.sample_rate,
+            'hot_keys': [{'key': key, 'count': count} for key, count in self.hot_keys.top(n)],
+            'big_keys': [{'key': key, 'size': size} for key, size in self.big_keys.top(n)],
+            'worst_policies': [
+                {'policy': policy, 'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses)}
+                for policy, (hits, misses) in policies[:n]
+            ],
+        }
+
+
+def get_analytics_router(
+    analytics: CacheAnalytics,
+    path: str = '/cache/analytics',
+    dependencies: Optional[Sequence[params.Depends]] = None,
+) -> APIRouter:
+    """Router exposing the analytics report; protect it with `dependencies`."""
+    router = APIRouter(dependencies=dependencies)
+
+    @router.get(path, include_in_schema=False)
+    def analytics_report(n: int = 10) -> Dict[str, Any]:
+        return analytics.report(n)
+
+    return router
+
+
+__all__ = ('CacheAnalytics', 'get_analytics_router')
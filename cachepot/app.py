@@ -1,10 +1,12 @@
+from enum import Enum
 from typing import Optional, List, Sequence, Callable, Any, Type, Dict, Union, TypeVar
 
 from fastapi import FastAPI, routing
 from fastapi.datastructures import Default
 from fastapi.params import Depends
 from fastapi.responses import Response
-from fastapi.types import DecoratedCallable
+from fastapi.routing import APIRoute
+from fastapi.types import DecoratedCallable, IncEx
 from fastapi.utils import generate_unique_id
 from starlette.responses import JSONResponse
 from starlette.routing import BaseRoute
@@ -86,5 +88,61 @@ class CachedFastAPI(FastAPI):
             return self.router.get(*args, cache_policy=cache_policy, **kwargs)
         return self.router.get(*args, **kwargs)
 
+    def post(
+        self,
+        path: str,
+        *,
+        response_model: Any = Default(None),
+        status_code: Optional[int] = None,
+        tags: Optional[List[Union[str, Enum]]] = None,
+        dependencies: Optional[Sequence[Depends]] = None,
+        summary: Optional[str] = None,
+        description: Optional[str] = None,
+        response_description: str = 'Successful Response',
+        responses: Optional[Dict[Union[int, str], Dict[str, Any]]] = None,
+        deprecated: Optional[bool] = None,
+        operation_id: Optional[str] = None,
+        response_model_include: Optional[IncEx] = None,
+        response_model_exclude: Optional[IncEx] = None,
+        response_model_by_alias: bool = True,
+        response_model_exclude_unset: bool = False,
+        response_model_exclude_defaults: bool = False,
+        response_model_exclude_none: bool = False,
+        include_in_schema: bool = True,
+        response_class: Type[Response] = Default(JSONResponse),
+        name: Optional[str] = None,
+        callbacks: Optional[List[BaseRoute]] = None,
+        openapi_extra: Optional[Dict[str, Any]] = None,
+        generate_unique_id_function: Callable[[APIRoute], str] = Default(generate_unique_id),
+        cache_policy: Optional[CachePolicy] = None,
+    ) -> Callable[[DecoratedCallable], DecoratedCallable]:
+        kwargs: Dict[str, Any] = dict(
+            response_model=response_model,
+            status_code=status_code,
+            tags=tags,
+            dependencies=dependencies,
+            summary=summary,
+            description=description,
+            response_description=response_description,
+            responses=responses,
+            deprecated=deprecated,
+            operation_id=operation_id,
+            response_model_include=response_model_include,
+            response_model_exclude=response_model_exclude,
+            response_model_by_alias=response_model_by_alias,
+            response_model_exclude_unset=response_model_exclude_unset,
+            response_model_exclude_defaults=response_model_exclude_defaults,
+            response_model_exclude_none=response_model_exclude_none,
+            include_in_schema=include_in_schema,
+            response_class=response_class,
+            name=name,
+            callbacks=callbacks,
+            openapi_extra=openapi_extra,
+            generate_unique_id_function=generate_unique_id_function,
+        )
+        if isinstance(self.router, CachedAPIRouter):
+            return self.router.post(path, cache_policy=cache_policy, **kwargs)
+        return self.router.post(path, **kwargs)
+
 
 __all__ = ('CachedFastAPI',)
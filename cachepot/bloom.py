@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import math
+import time
+from time import monotonic
+from typing import List, Optional
+
+from cachepot.storages.abstract import AbstractStorage
+
+
+class BloomFilter:
+    """Plain Bloom filter over a bit array, sized for `capacity` items at `error_rate` false positives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        assert capacity > 0 and 0 < error_rate < 1, 'Expected positive capacity and error_rate in (0, 1)'
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _indexes(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for index in self._indexes(item):
+            self.bits[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(item))
+
+    def merge(self, bits: bytes) -> None:
+        if len(bits) == len(self.bits):
+            self.bits = bytearray((int.from_bytes(self.bits, 'little') | int.from_bytes(bits, 'little')).to_bytes(
+                len(self.bits), 'little'
+            ))
+
+
+class RotatingBloomFilter:
+    """In-process membership filter of the keys stored recently, to skip lookups of keys known to be absent.
+
+    Time is split into generations of `rotation_interval` seconds, aligned on the wall clock so that
+    all workers agree on them. Keys are added to the current generation and looked up in the current
+    and the previous one, so keys are remembered for at least one interval. Keep `rotation_interval`
+    at or above the longest TTL of the policies using the filter.
+
+    A "not present" answer is only trusted once the filter knows about every entry that could be
+    stored: after a successful `sync` with other workers, or after one full interval in this process.
+    Without `sync`, keys stored by other workers are reported absent, which costs a recompute, not correctness.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01, rotation_interval: float = 3600):
+        assert rotation_interval > 0, 'rotation_interval must be positive'
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rotation_interval = rotation_interval
+        self.generation = self._get_generation()
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = BloomFilter(capacity, error_rate)
+        self._started_at = monotonic()
+        self._synced = False
+
+    def _get_generation(self) -> int:
+        return int(time.time() // self.rotation_interval)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._synced or monotonic() - self._started_at >= self.rotation_interval
+
+    def _rotate(self) -> None:
+        generation = self._get_generation()
+        if generation != self.generation:
+            if generation == self.generation + 1:
+                self.previous = self.current
+            else:
+                self.previous = BloomFilter(self.capacity, self.error_rate)
+            self.current = BloomFilter(self.capacity, self.error_rate)
+            self.generation = generation
+
+    def add(self, key: str) -> None:
+        self._rotate()
+        self.current.add(key)
+
+    def might_contain(self, key: str) -> bool:
+        self._rotate()
+        return not self.is_ready or key in self.current or key in self.previous
+
+    async def sync(self, storage: AbstractStorage, name: str = 'default') -> None:
+        """Merge this filter with the copy shared through `storage`, and publish the union back.
+
+        Concurrent syncs may drop each other's bits; such keys are looked up again after their next store.
+        """
+        self._rotate()
+        current_key = f'cachepot:bloom:{name}:{self.generation}'
+        current, previous = await storage.get_many([current_key, f'cachepot:bloom:{name}:{self.generation - 1}'])
+        if current:
+            self.current.merge(current)
+        if previous:
+            self.previous.merge(previous)
+        await storage.set(current_key, bytes(self.current.bits), expire=int(2 * self.rotation_interval))
+        self._synced = True
+
+    async def run_sync(self, storage: AbstractStorage, interval: float = 5.0, name: str = 'default') -> None:
+        """Sync every `interval` seconds until cancelled; start it as a task in the app lifespan."""
+        while True:
+            try:
+                await self.sync(storage, name)
+            except Exception:
+                pass  # the filter keeps working locally, the next sync catches up
+            await asyncio.sleep(interval)
+
+
+__all__ = ('BloomFilter', 'RotatingBloomFilter')
@@ -0,0 +1,74 @@
+from collections import deque
+from enum import Enum
+from time import monotonic
+from typing import Deque, Optional
+
+
+class BreakerState(str, Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Stops calling a failing or slow storage for a cooldown period.
+
+    The breaker opens once at least `min_calls` of the last `window` calls were recorded and
+    the share of failed calls reaches `failure_threshold`. A call slower than `latency_threshold`
+    counts as failed. After `cooldown` seconds a single probe call is let through:
+    its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        latency_threshold: Optional[float] = None,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown: float = 5.0,
+    ):
+        assert 0 < failure_threshold <= 1, 'failure_threshold must be in (0, 1]'
+        assert 0 < min_calls <= window, 'Expected 0 < min_calls <= window'
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.state = BreakerState.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == BreakerState.OPEN and monotonic() - self._opened_at >= self.cooldown:
+            self.state = BreakerState.HALF_OPEN
+        if self.state == BreakerState.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == BreakerState.CLOSED
+
+    def record(self, success: bool, latency: float = 0.0) -> None:
+        if self.latency_threshold is not None and latency > self.latency_threshold:
+            success = False
+        if self.state == BreakerState.HALF_OPEN:
+            self._probing = False
+            if success:
+                self.state = BreakerState.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_threshold:
+            self._open()
+
+    def abandon(self) -> None:
+        """Forget a call that ended without an outcome, e.g. cancelled, so a pending probe can be retried."""
+        self._probing = False
+
+    def _open(self) -> None:
+        self.state = BreakerState.OPEN
+        self._opened_at = monotonic()
+        self._outcomes.clear()
@@ -1,11 +1,101 @@
+import time
 from dataclasses import dataclass
-from typing import Callable, Optional, Union
+from email.utils import formatdate
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Union
 
 from fastapi import Request
 
+from cachepot.analytics import CacheAnalytics
+from cachepot.bloom import RotatingBloomFilter
+from cachepot.breaker import CircuitBreaker
+from cachepot.refresh import RefreshAhead
+from cachepot.shadow import ShadowStats
 from cachepot.storages.abstract import AbstractStorage
 
 
+@dataclass
+class AdaptiveTTL:
+    """Adjusts TTL by how often the cached content actually changes between recomputes.
+
+    Every recompute that yields the same body multiplies the TTL by `factor`,
+    every recompute that yields a different body divides it, within [min_ttl, max_ttl].
+    """
+    min_ttl: int
+    max_ttl: int
+    factor: float = 2.0
+
+    def __post_init__(self) -> None:
+        assert 0 < self.min_ttl <= self.max_ttl, 'Expected 0 < min_ttl <= max_ttl'
+        assert self.factor > 1, 'factor must be greater than 1'
+
+    def clamp(self, ttl: float) -> int:
+        return int(min(max(ttl, self.min_ttl), self.max_ttl))
+
+    def next_ttl(self, ttl: int, changed: bool) -> int:
+        return self.clamp(ttl / self.factor if changed else ttl * self.factor)
+
+
+@dataclass
+class HTTPCacheHeaders:
+    """Emit `Cache-Control`, `Expires` and `Age` computed from the remaining TTL of the cached entry.
+
+    `max_age` and `shared_max_age` cap the `max-age` and `s-maxage` directives;
+    private responses get no `s-maxage`, so shared caches don't store them.
+    """
+    private: bool = False
+    max_age: Optional[int] = None
+    shared_max_age: Optional[int] = None
+
+    def get_headers(self, ttl: Optional[int], age: Optional[int] = None) -> Dict[str, str]:
+        remaining = max(ttl - (age or 0), 0) if ttl is not None else None
+        max_age = _min_defined(remaining, self.max_age)
+        directives = ['private' if self.private else 'public']
+        if max_age is not None:
+            directives.append(f'max-age={max_age}')
+        if not self.private and (shared_max_age := _min_defined(remaining, self.shared_max_age)) is not None:
+            directives.append(f's-maxage={shared_max_age}')
+
+        headers = {'Cache-Control': ', '.join(directives)}
+        if max_age is not None:
+            headers['Expires'] = formatdate(time.time() + max_age, usegmt=True)
+        if age is not None:
+            headers['Age'] = str(age)
+        return headers
+
+
+@dataclass
+class BatchPolicy:
+    """Cache the items of a batch endpoint one by one instead of whole responses.
+
+    `param` names the endpoint parameter holding the requested IDs, either a list or a string
+    joined with `separator`. The endpoint must return a list of items, and `item_id` is the field
+    (or a function of the serialized item) giving each item's ID. Only the IDs missing from
+    the cache are passed to the endpoint.
+    """
+    param: str
+    item_id: Union[str, Callable[[Any], Any]] = 'id'
+    separator: str = ','
+
+    def split(self, value: Any) -> Dict[str, Any]:
+        """Map the string form of every requested ID to its parsed value, in request order."""
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(self.separator) if item.strip()]
+        return {str(item): item for item in value or ()}
+
+    def join(self, ids: List[str], requested: Dict[str, Any], value: Any) -> Any:
+        """Build the parameter value requesting only `ids`, in the form the endpoint received."""
+        if isinstance(value, str):
+            return self.separator.join(ids)
+        return type(value)(requested[item] for item in ids) if isinstance(value, (list, tuple, set)) else ids
+
+    def get_item_id(self, item: Any) -> str:
+        return str(item[self.item_id] if isinstance(self.item_id, str) else self.item_id(item))
+
+
+def _min_defined(*values: Optional[int]) -> Optional[int]:
+    return min((value for value in values if value is not None), default=None)
+
+
 @dataclass
 class CachePolicy:
     storage: AbstractStorage
@@ -14,6 +104,57 @@ class CachePolicy:
     ttl: Optional[int] = 30
     respect_no_cache: bool = True
     cached_response_header: str = 'X-Cache-Hit'
+    adaptive_ttl: Optional[AdaptiveTTL] = None
+    cacheable_status_codes: FrozenSet[int] = frozenset({200, 203, 204, 300, 301, 308})
+    negative_status_codes: FrozenSet[int] = frozenset({404, 410})
+    negative_ttl: Optional[int] = 5
+    # With a timeout or a breaker set, a failed or timed-out storage call is treated as a miss
+    # (or a dropped write) instead of failing the request
+    storage_timeout: Optional[float] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    http_cache: Optional[HTTPCacheHeaders] = None
+    serve_ranges: bool = False
+    # Methods other than GET are keyed on the path and a canonical hash of the parsed request body
+    methods: FrozenSet[str] = frozenset({'GET'})
+    # Keys are prefixed with the namespace and its current version, see `bump_namespace`
+    namespace: Union[None, str, Callable[[Request], str]] = None
+    namespace_cache_ttl: float = 1.0
+    analytics: Optional[CacheAnalytics] = None
+    # Identifies the policy in analytics reports; defaults to the key, or the qualified name of the key function,
+    # which lambdas defined in the same function share
+    name: Optional[str] = None
+    # Keep a content hash next to each entry and, when a recompute of a still stored entry yields the same
+    # content (e.g. on refresh-ahead replays), only reset the entry TTL; not applied with `http_cache`,
+    # whose Age relies on the store time
+    touch_unchanged: bool = False
+    # Store each distinct body once under its content hash, keys only hold a small pointer record
+    deduplicate_bodies: bool = False
+    # Skips storage lookups of keys the filter has never seen stored
+    membership_filter: Optional[RotatingBloomFilter] = None
+    # Entries of at least this many bytes are encoded, decoded and hashed off the event loop
+    offload_threshold: Optional[int] = None
+    # Caps concurrent endpoint calls per route; excess misses queue for up to `queue_timeout` seconds,
+    # re-check the cache once they get a slot, and get a 503 when the queue is full or the wait expires
+    max_concurrency: Optional[int] = None
+    max_queued: Optional[int] = None
+    queue_timeout: Optional[float] = 5.0
+    refresh_ahead: Optional[RefreshAhead] = None
+    # The key should identify the endpoint rather than the request, items are keyed as `{key}:{param}:{id}`
+    batch: Optional[BatchPolicy] = None
+    # Evaluate the policy without serving from the cache, see `ShadowStats`
+    shadow: Optional[ShadowStats] = None
 
     def get_key(self, request: Request) -> str:
         return self.key if isinstance(self.key, str) else self.key(request)
+
+    @property
+    def label(self) -> str:
+        if self.name is not None:
+            return self.name
+        return self.key if isinstance(self.key, str) else getattr(self.key, '__qualname__', repr(self.key))
+
+    def get_namespace(self, request: Optional[Request] = None) -> Optional[str]:
+        if self.namespace is None or isinstance(self.namespace, str):
+            return self.namespace
+        assert request is not None, 'A callable namespace requires a request'
+        return self.namespace(request)
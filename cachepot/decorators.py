@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, TypeVar, cast, get_type_hints
+
+from typing_extensions import ParamSpec
+
+from cachepot.constants import CachePolicy
+from cachepot.encoders import arguments_hash
+from cachepot.serializers import AbstractSerializer, PydanticSerializer
+from cachepot.utils import apply_namespace, storage_get, storage_set
+
+P = ParamSpec('P')
+R = TypeVar('R')
+
+
+class _LeaderCancelled(Exception):
+    """Tells coalesced waiters to retry, as the cancellation of the computing call isn't theirs."""
+
+
+def _key_arguments(arguments: Dict[str, Any], ignore_self: bool) -> Dict[str, Any]:
+    """Arguments the key is built from: `self` stands for its class and JSON-encoded state, `cls` for its name."""
+    arguments = dict(arguments)
+    if ignore_self:
+        arguments.pop('self', None)
+        arguments.pop('cls', None)
+    if 'self' in arguments:
+        instance = arguments['self']
+        arguments['self'] = [f'{type(instance).__module__}.{type(instance).__qualname__}', instance]
+    if isinstance(arguments.get('cls'), type):
+        arguments['cls'] = f'{arguments["cls"].__module__}.{arguments["cls"].__qualname__}'
+    return arguments
+
+
+def cached(
+    cache_policy: CachePolicy,
+    serializer: Optional[AbstractSerializer] = None,
+    ignore_self: bool = False,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Coroutine[Any, Any, R]]]:
+    """Cache results of an arbitrary coroutine function in the policy storage.
+
+    The key is built from the (string) policy key, the function name and its arguments. For methods,
+    `self` is keyed on its class and its JSON-encoded state (e.g. a client's base URL and credentials),
+    so differently configured instances never share results; instances that can't be encoded are not
+    cached. Pass `ignore_self=True` when all instances are interchangeable. Results are serialized with
+    pydantic according to the return annotation unless another `serializer` is given. Concurrent calls
+    with the same arguments in one process share a single computation instead of stampeding the origin.
+    """
+    assert isinstance(cache_policy.key, str), 'cached() requires a string CachePolicy.key'
+    assert not callable(cache_policy.namespace), 'cached() requires a string CachePolicy.namespace'
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Coroutine[Any, Any, R]]:
+        assert inspect.iscoroutinefunction(func), 'cached() can only decorate coroutine functions'
+        signature = inspect.signature(func)
+        func_serializer = serializer or PydanticSerializer(get_type_hints(func).get('return', Any))
+        qualified_name = f'{func.__module__}.{func.__qualname__}'
+        in_flight: Dict[str, 'asyncio.Future[R]'] = {}
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not cache_policy.is_active:
+                return await func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            values_hash = arguments_hash(_key_arguments(bound.arguments, ignore_self))
+            if values_hash is None:
+                return await func(*args, **kwargs)
+
+            key = await apply_namespace(cache_policy, f'{cache_policy.key}:{qualified_name}:{values_hash}')
+            if key is None:
+                return await func(*args, **kwargs)
+            while True:
+                if (future := in_flight.get(key)) is None:
+                    if data := await storage_get(cache_policy, key):
+                        return cast(R, func_serializer.loads(data))
+                    if (future := in_flight.get(key)) is None:
+                        break
+                try:
+                    return await asyncio.shield(future)
+                except _LeaderCancelled:
+                    continue  # the computing call was cancelled, one of its waiters takes over
+
+            future = asyncio.get_running_loop().create_future()
+            in_flight[key] = future
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException as e:
+                in_flight.pop(key, None)
+                future.set_exception(_LeaderCancelled() if isinstance(e, asyncio.CancelledError) else e)
+                future.exception()  # waiters re-raise it, don't log it as never retrieved
+                raise
+            future.set_result(result)
+            # The future stays in flight until the result is stored, so callers arriving meanwhile reuse it
+            try:
+                await storage_set(cache_policy, key=key, value=func_serializer.dumps(result), expire=cache_policy.ttl)
+            finally:
+                in_flight.pop(key, None)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = ('cached',)
@@ -0,0 +1,90 @@
+import functools
+import inspect
+from typing import Any, Callable, Coroutine, Optional, get_type_hints
+
+from fastapi import BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import SecurityScopes
+from starlette.requests import HTTPConnection, Request
+from starlette.responses import Response
+
+from cachepot.constants import CachePolicy
+from cachepot.encoders import arguments_hash
+from cachepot.serializers import AbstractSerializer, PydanticSerializer
+from cachepot.utils import apply_namespace, storage_get, storage_set
+
+# Values FastAPI injects by type; they are never part of the dependency's cache key
+_INJECTED_TYPES = (HTTPConnection, Response, BackgroundTasks, SecurityScopes)
+_REQUEST_PARAMETER = 'cachepot_request'
+
+
+def cached_dependency(
+    dependency: Callable[..., Any],
+    cache_policy: CachePolicy,
+    serializer: Optional[AbstractSerializer] = None,
+) -> Callable[..., Coroutine[Any, Any, Any]]:
+    """Wrap a FastAPI dependency so its result is cached in the policy storage.
+
+    The result is keyed on the policy key, the dependency name and the dependency's own resolved
+    arguments (query parameters, sub-dependency results, etc.), and serialized with pydantic
+    according to the dependency's return annotation unless another `serializer` is given.
+    Use it as `Depends(cached_dependency(func, policy))`.
+    Arguments that can't be JSON-encoded make the call bypass the cache. The request or connection itself
+    is not part of the key, so a dependency that takes one is only cached with a callable policy `key`,
+    which has to tell its callers apart (e.g. by the `Authorization` header); otherwise it is always called.
+    """
+    assert not (
+        inspect.isgeneratorfunction(dependency) or inspect.isasyncgenfunction(dependency)
+    ), 'Dependencies with yield can not be cached'
+
+    type_hints = get_type_hints(dependency, include_extras=True)
+    serializer = serializer or PydanticSerializer(type_hints.get('return', Any))
+    signature = inspect.signature(dependency)
+    parameters = [
+        parameter.replace(annotation=type_hints.get(name, parameter.annotation))
+        for name, parameter in signature.parameters.items()
+    ]
+    request_parameter = next(
+        (parameter.name for parameter in parameters if parameter.annotation is Request), None
+    )
+    reads_connection = any(
+        inspect.isclass(parameter.annotation) and issubclass(parameter.annotation, HTTPConnection)
+        for parameter in parameters
+    )
+    if request_parameter is None:
+        parameters.append(inspect.Parameter(_REQUEST_PARAMETER, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+    qualified_name = f'{dependency.__module__}.{dependency.__qualname__}'
+
+    async def call(**kwargs: Any) -> Any:
+        if inspect.iscoroutinefunction(dependency):
+            return await dependency(**kwargs)
+        return await run_in_threadpool(dependency, **kwargs)
+
+    @functools.wraps(dependency)
+    async def wrapper(**kwargs: Any) -> Any:
+        request: Request = kwargs[request_parameter] if request_parameter else kwargs.pop(_REQUEST_PARAMETER)
+        policy = cache_policy
+        if not policy.is_active or (reads_connection and isinstance(policy.key, str)) or (
+            policy.respect_no_cache and request.headers.get('cache-control') == 'no-cache'
+        ):
+            return await call(**kwargs)
+        values_hash = arguments_hash(
+            {name: value for name, value in kwargs.items() if not isinstance(value, _INJECTED_TYPES)}
+        )
+        if values_hash is None:
+            return await call(**kwargs)
+
+        key = await apply_namespace(policy, f'{policy.get_key(request)}:{qualified_name}:{values_hash}', request)
+        if key is None:
+            return await call(**kwargs)
+        if data := await storage_get(policy, key):
+            return serializer.loads(data)
+        result = await call(**kwargs)
+        await storage_set(policy, key=key, value=serializer.dumps(result), expire=policy.ttl)
+        return result
+
+    setattr(wrapper, '__signature__', signature.replace(parameters=parameters))
+    return wrapper
+
+
+__all__ = ('cached_dependency',)
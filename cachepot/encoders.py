@@ -1,6 +1,10 @@
-from typing import Any, Annotated
+import hashlib
+import json
+import time
+from typing import Any, Annotated, Dict, Optional
 
 from fastapi import Response
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, ConfigDict, GetCoreSchemaHandler, GetJsonSchemaHandler
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
@@ -43,15 +47,23 @@ class ResponseEncoder(BaseModel):
     body: bytes
     status_code: int
     headers: MutableHeadersType
+    stored_at: Optional[float] = None
+    ttl: Optional[int] = None
 
     @classmethod
-    def encode(cls, response: Response) -> 'ResponseEncoder':
+    def encode(cls, response: Response, ttl: Optional[int] = None) -> 'ResponseEncoder':
         return ResponseEncoder(
             body=response.body,
             status_code=response.status_code,
-            headers=response.headers
+            headers=response.headers,
+            stored_at=time.time(),
+            ttl=ttl,
         )
 
+    @property
+    def age(self) -> int:
+        return max(int(time.time() - self.stored_at), 0) if self.stored_at is not None else 0
+
     def decode(self) -> Response:
         return Response(
             content=self.body,
@@ -59,5 +71,22 @@ class ResponseEncoder(BaseModel):
             headers=self.headers,
         )
 
+    def fingerprint(self) -> str:
+        """Hash of the response content, ignoring when and for how long it was stored."""
+        return content_hash(self.model_dump_json(include={'body', 'status_code', 'headers'}).encode())
+
     def cache_data(self) -> bytes:
         return self.model_dump_json().encode()
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def arguments_hash(arguments: Dict[str, Any]) -> Optional[str]:
+    """Hash call arguments independently of their order, or return None if they can't be JSON-encoded."""
+    try:
+        data = json.dumps(jsonable_encoder(arguments), sort_keys=True, separators=(',', ':'))
+    except (TypeError, ValueError, RecursionError):
+        return None
+    return content_hash(data.encode())
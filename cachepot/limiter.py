@@ -0,0 +1,46 @@
+import asyncio
+from typing import Optional
+
+
+class OriginOverloaded(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent origin calls.
+
+    Calls over `max_concurrency` wait in a queue of at most `max_queued` callers (unbounded if None)
+    for up to `timeout` seconds; a full queue or an expired wait raises `OriginOverloaded`.
+    The semaphore is created on first use, so the limiter can be built outside of a running event loop.
+    """
+
+    def __init__(self, max_concurrency: int, max_queued: Optional[int] = None, timeout: Optional[float] = None):
+        assert max_concurrency > 0, 'max_concurrency must be positive'
+        assert max_queued is None or max_queued >= 0, 'max_queued must not be negative'
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self) -> bool:
+        """Take a slot and return whether the caller had to wait for it."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return False
+        if self.max_queued is not None and self.waiting >= self.max_queued:
+            raise OriginOverloaded('Too many calls are waiting for the origin')
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise OriginOverloaded('Timed out waiting for the origin') from None
+        finally:
+            self.waiting -= 1
+        return True
+
+    def release(self) -> None:
+        assert self._semaphore is not None, 'release() called before acquire()'
+        self._semaphore.release()
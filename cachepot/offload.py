@@ -0,0 +1,31 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='cachepot')
+    return _executor
+
+
+def set_executor(executor: Executor) -> None:
+    """Replace the pool large cache entries are encoded, decoded and hashed in."""
+    global _executor
+    _executor = executor
+
+
+async def run_sized(threshold: Optional[int], size: int, func: Callable[..., T], *args: Any) -> T:
+    """Run CPU-bound `func` inline for small inputs, or in the bounded pool once `size` reaches `threshold`
+    bytes, so that large entries don't block the event loop for every other request.
+    """
+    if threshold is None or size < threshold:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args))
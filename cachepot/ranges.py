@@ -0,0 +1,84 @@
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+from starlette.requests import Request
+
+from cachepot.encoders import ResponseEncoder
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive (start, end) offsets.
+
+    Returns None for headers that should be ignored (other units, multiple ranges, bad syntax),
+    in which case the whole body is served.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable
+            return max(size - suffix, 0), size - 1
+        start, end = int(first), int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def if_range_matches(if_range: str, entry: ResponseEncoder) -> bool:
+    """Whether the validator of an `If-Range` request header still matches the cached entry."""
+    if if_range.startswith(('"', 'W/')):
+        etag = entry.headers.get('etag')
+        return etag is not None and not etag.startswith('W/') and etag == if_range
+    try:
+        validator = parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+    if last_modified := entry.headers.get('last-modified'):
+        try:
+            return parsedate_to_datetime(last_modified).timestamp() == validator
+        except (TypeError, ValueError):
+            return False
+    return entry.stored_at is not None and entry.stored_at <= validator
+
+
+def apply_range(request: Request, entry: ResponseEncoder) -> ResponseEncoder:
+    """Answer a `Range` request from a cached full response with 206 Partial Content (or 416)."""
+    entry.headers['accept-ranges'] = 'bytes'
+    range_header = request.headers.get('range')
+    if not range_header or entry.status_code != 200:
+        return entry
+    if (if_range := request.headers.get('if-range')) and not if_range_matches(if_range, entry):
+        return entry
+
+    size = len(entry.body)
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        entry.body = b''
+        entry.status_code = 416
+        entry.headers['content-range'] = f'bytes */{size}'
+        entry.headers['content-length'] = '0'
+        return entry
+    if byte_range is None:
+        return entry
+
+    start, end = byte_range
+    entry.body = entry.body[start:end + 1]
+    entry.status_code = 206
+    entry.headers['content-range'] = f'bytes {start}-{end}/{size}'
+    entry.headers['content-length'] = str(len(entry.body))
+    return entry
@@ -0,0 +1,137 @@
+import asyncio
+import heapq
+import random
+from dataclasses import dataclass
+from time import monotonic
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from starlette.requests import Request
+from starlette.types import ASGIApp
+
+from cachepot.warming import call_asgi
+
+# Set on replayed requests: the handler skips the cache lookup but stores the fresh response as usual
+REFRESH_SCOPE_KEY = 'cachepot.refresh'
+DEFAULT_REPLAY_HEADERS = ('host', 'accept', 'accept-encoding', 'accept-language')
+
+
+@dataclass
+class _Tracked:
+    url: str
+    headers: Dict[str, str]
+    version: int
+    hits: int = 0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        assert rate > 0, 'rate must be positive'
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated_at = monotonic()
+
+    def take(self) -> bool:
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RefreshAhead:
+    """Recomputes popular entries shortly before they expire, so hot keys don't miss.
+
+    Every stored GET response is scheduled for `lead_time` seconds (minus up to `jitter` seconds)
+    before its expiry. When it is due and was hit at least `min_hits` times since it was stored,
+    its request is replayed through the app, whose fresh response replaces the entry and schedules
+    the next refresh. Replays start at most `rate` per second (with bursts of `burst`); keys that
+    can't get a token wait for the next round. At most `capacity` keys are tracked at a time.
+    Only the `headers` the cache key depends on are kept and replayed, never credentials such as
+    Authorization or Cookie, nor conditional or Range headers.
+    Run `run(app)` as a background task, e.g. from the app lifespan.
+    """
+
+    def __init__(
+        self,
+        min_hits: int = 3,
+        lead_time: float = 5.0,
+        jitter: float = 1.0,
+        rate: float = 10.0,
+        burst: Optional[float] = None,
+        capacity: int = 10000,
+        headers: Sequence[str] = DEFAULT_REPLAY_HEADERS,
+    ):
+        assert min_hits > 0 and lead_time >= 0 and jitter >= 0, 'Expected positive min_hits, lead_time and jitter'
+        self.min_hits = min_hits
+        self.lead_time = lead_time
+        self.jitter = jitter
+        self.capacity = capacity
+        self.headers = frozenset(name.lower() for name in headers)
+        self.refreshed = 0
+        self.failed = 0
+        self._bucket = TokenBucket(rate, burst)
+        self._tracked: Dict[str, _Tracked] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        self._tasks: Set['asyncio.Task[None]'] = set()
+
+    def record_hit(self, key: str) -> None:
+        if tracked := self._tracked.get(key):
+            tracked.hits += 1
+
+    def record_store(self, key: str, request: Request, ttl: Optional[int]) -> None:
+        if ttl is None or request.method != 'GET' or (key not in self._tracked and len(self._tracked) >= self.capacity):
+            return
+        self._counter += 1
+        headers = {name: value for name, value in request.headers.items() if name in self.headers}
+        self._tracked[key] = _Tracked(url=str(request.url), headers=headers, version=self._counter)
+        due = monotonic() + ttl - self.lead_time - random.uniform(0, self.jitter)
+        heapq.heappush(self._schedule, (due, self._counter, key))
+
+    async def _replay(self, app: ASGIApp, tracked: _Tracked) -> None:
+        try:
+            status_code = await call_asgi(
+                app, tracked.url, headers=tracked.headers, extensions={REFRESH_SCOPE_KEY: True}
+            )
+        except Exception:
+            status_code = 0
+        if 200 <= status_code < 400:
+            self.refreshed += 1
+        else:
+            self.failed += 1
+
+    def refresh_due(self, app: ASGIApp) -> int:
+        """Start replays of the due popular keys and return how many were started."""
+        started = 0
+        now = monotonic()
+        while self._schedule and self._schedule[0][0] <= now:
+            item = heapq.heappop(self._schedule)
+            _, version, key = item
+            tracked = self._tracked.get(key)
+            if tracked is None or tracked.version != version:
+                continue
+            if tracked.hits < self.min_hits:
+                del self._tracked[key]
+                continue
+            if not self._bucket.take():
+                heapq.heappush(self._schedule, item)
+                break
+            # The replay's store tracks the key again, with a fresh hit count
+            del self._tracked[key]
+            task = asyncio.ensure_future(self._replay(app, tracked))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+        return started
+
+    async def run(self, app: ASGIApp, interval: float = 0.5) -> None:
+        """Start due refreshes every `interval` seconds, until cancelled."""
+        while True:
+            self.refresh_due(app)
+            await asyncio.sleep(interval)
+
+
+__all__ = ('RefreshAhead', 'TokenBucket')
@@ -0,0 +1,39 @@
+import abc
+import pickle
+from typing import Any
+
+from pydantic import TypeAdapter
+
+
+class AbstractSerializer(abc.ABC):
+
+    @abc.abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PydanticSerializer(AbstractSerializer):
+    """JSON serialization validated against a type, so pydantic models and dataclasses come back as such."""
+
+    def __init__(self, type_: Any = Any):
+        self.adapter: TypeAdapter[Any] = TypeAdapter(type_)
+
+    def dumps(self, value: Any) -> bytes:
+        return self.adapter.dump_json(value)
+
+    def loads(self, data: bytes) -> Any:
+        return self.adapter.validate_json(data)
+
+
+class PickleSerializer(AbstractSerializer):
+    """Serializes any picklable value. Only use it with storages nobody else can write to."""
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
@@ -0,0 +1,54 @@
+import zlib
+from typing import Any, Dict
+
+
+class ShadowStats:
+    """Outcome of a policy running in shadow mode, where entries are looked up and stored
+    but the fresh response is always served.
+
+    Sampling is done per key, so a sampled key is looked up on every request, stored on misses, and the
+    hit ratio of the sampled keys is representative of the whole route. A hit is stale when the
+    cached response differs from the fresh one; `latency_saved` sums the time the endpoint took
+    on fresh hits, which caching would have saved.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        assert 0 < sample_rate <= 1, 'sample_rate must be in (0, 1]'
+        self.sample_rate = sample_rate
+        self.lookups = 0
+        self.hits = 0
+        self.stale = 0
+        self.latency_saved = 0.0
+
+    def sampled(self, key: str) -> bool:
+        return self.sample_rate >= 1 or zlib.crc32(key.encode()) < self.sample_rate * 2 ** 32
+
+    def record(self, hit: bool, stale: bool, latency: float) -> None:
+        self.lookups += 1
+        if hit:
+            self.hits += 1
+            if stale:
+                self.stale += 1
+            else:
+                self.latency_saved += latency
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def staleness_rate(self) -> float:
+        return self.stale / self.hits if self.hits else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'sample_rate': self.sample_rate,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_ratio': self.hit_ratio,
+            'staleness_rate': self.staleness_rate,
+            'latency_saved': self.latency_saved,
+        }
+
+
+__all__ = ('ShadowStats',)
@@ -0,0 +1,330 @@
+"""Replay an access log through a cache policy to see what a TTL, size or key change would do.
+
+Each log line holds whitespace-separated `timestamp method path query size` fields, where the
+timestamp is Unix seconds or ISO 8601 and `-` stands for an empty query or unknown size.
+Malformed lines are skipped and counted rather than aborting the replay.
+The log is streamed once and every configuration is simulated side by side on the log's own clock:
+
+    python -m cachepot.simulator access.log.gz --policy app.policies:items --ttl 30 300 \\
+        --capacity 64M 256M --eviction lru gds
+"""
+import argparse
+import gzip
+import heapq
+import importlib
+import itertools
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from starlette.requests import Request
+
+from cachepot.constants import CachePolicy
+from cachepot.storages.dummy import DummyStorage
+from cachepot.utils import is_cachable
+
+EVICTION_POLICIES = ('lru', 'lfu', 'gds', 'fifo')
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+@dataclass(frozen=True)
+class AccessRecord:
+    timestamp: float
+    method: str
+    path: str
+    query: str
+    size: int
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    ttl: Optional[int]
+    capacity: Optional[int] = None
+    eviction: str = 'lru'
+
+    def __post_init__(self) -> None:
+        assert self.eviction in EVICTION_POLICIES, f'eviction must be one of {EVICTION_POLICIES}'
+        assert self.capacity is None or self.capacity > 0, 'capacity must be positive'
+
+
+@dataclass
+class SimulationResult:
+    config: SimulationConfig
+    requests: int = 0
+    hits: int = 0
+    origin_requests: int = 0
+    origin_bytes: int = 0
+    served_bytes: int = 0
+    evictions: int = 0
+    memory: int = 0
+    peak_memory: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    @property
+    def byte_hit_ratio(self) -> float:
+        return 1 - self.origin_bytes / self.served_bytes if self.served_bytes else 0.0
+
+
+@dataclass
+class SkippedLines:
+    """Count of malformed log lines, keeping only the first `keep` line numbers."""
+
+    count: int = 0
+    first: List[int] = field(default_factory=list)
+    keep: int = 5
+
+    def add(self, number: int) -> None:
+        self.count += 1
+        if len(self.first) < self.keep:
+            self.first.append(number)
+
+    def __str__(self) -> str:
+        lines = ', '.join(map(str, self.first)) + (', ...' if self.count > len(self.first) else '')
+        return f'skipped {self.count} malformed lines ({lines})'
+
+
+@dataclass
+class _Entry:
+    size: int
+    expires_at: Optional[float]
+    version: int
+    frequency: int = 1
+    priority: float = 0.0
+
+
+@dataclass
+class SimulatedCache:
+    """Byte-bounded cache model on a virtual clock.
+
+    `lru` and `fifo` keep entries in insertion or access order, `lfu` evicts the least frequently
+    hit entry and `gds` follows GreedyDual-Size with a uniform cost, like `MemoryStorage` does
+    for responses of equal compute time. Expired entries keep their memory until they are
+    looked up again or evicted, as in a storage with lazy expiry.
+    """
+
+    result: SimulationResult
+    _entries: 'OrderedDict[str, _Entry]' = field(default_factory=OrderedDict)
+    _heap: List[Tuple[float, int, str]] = field(default_factory=list)
+    _counter: int = 0
+    _inflation: float = 0.0
+
+    @property
+    def config(self) -> SimulationConfig:
+        return self.result.config
+
+    def _rank(self, key: str, entry: _Entry) -> None:
+        self._counter += 1
+        entry.version = self._counter
+        if self.config.eviction == 'lru':
+            self._entries.move_to_end(key)
+        elif self.config.eviction in ('lfu', 'gds'):
+            entry.priority = entry.frequency if self.config.eviction == 'lfu' else self._inflation + 1 / entry.size
+            heapq.heappush(self._heap, (entry.priority, entry.version, key))
+
+    def _remove(self, key: str) -> None:
+        self.result.memory -= self._entries.pop(key).size
+
+    def _evict(self) -> None:
+        if self.config.eviction in ('lru', 'fifo'):
+            key = next(iter(self._entries))
+        else:
+            while True:
+                _, version, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is not None and entry.version == version:
+                    break
+            self._inflation = max(self._inflation, entry.priority)
+        self._remove(key)
+        self.result.evictions += 1
+
+    def lookup(self, key: str, now: float) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry.expires_at is not None and entry.expires_at <= now:
+            self._remove(key)
+            return False
+        entry.frequency += 1
+        self._rank(key, entry)
+        return True
+
+    def store(self, key: str, size: int, now: float) -> None:
+        capacity = self.config.capacity
+        if capacity is not None and size > capacity:
+            return
+        ttl = self.config.ttl
+        entry = _Entry(size=size, expires_at=now + ttl if ttl is not None else None, version=0)
+        self._entries[key] = entry
+        self.result.memory += size
+        self._rank(key, entry)
+        while capacity is not None and self.result.memory > capacity:
+            self._evict()
+        self.result.peak_memory = max(self.result.peak_memory, self.result.memory)
+
+
+def parse_size(value: str) -> Optional[int]:
+    """Parse sizes like `512`, `64K` or `1.5G`; `inf` means unbounded."""
+    value = value.strip().upper().rstrip('B')
+    if value in ('INF', 'NONE'):
+        return None
+    unit = value[-1:] if value[-1:] in _UNITS else ''
+    return int(float(value[:len(value) - len(unit)]) * _UNITS[unit])
+
+
+def parse_timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_record(fields: Sequence[str]) -> AccessRecord:
+    timestamp, method, path, query, size = fields
+    return AccessRecord(
+        timestamp=parse_timestamp(timestamp),
+        method=method.upper(),
+        path=path,
+        query='' if query == '-' else query.lstrip('?'),
+        size=0 if size == '-' else int(size),
+    )
+
+
+def read_log(lines: Iterable[str], skipped: Optional[SkippedLines] = None) -> Iterator[AccessRecord]:
+    """Lazily parse access log lines, skipping blank lines and `#` comments.
+
+    Malformed lines are skipped too, and counted in `skipped` when it is passed.
+    """
+    for number, line in enumerate(lines, start=1):
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        try:
+            yield parse_record(fields)
+        except ValueError:
+            if skipped is not None:
+                skipped.add(number)
+
+
+def make_request(record: AccessRecord) -> Request:
+    return Request({
+        'type': 'http',
+        'http_version': '1.1',
+        'method': record.method,
+        'scheme': 'http',
+        'path': record.path,
+        'raw_path': record.path.encode(),
+        'query_string': record.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': None,
+        'server': ('localhost', 80),
+    })
+
+
+def url_key(request: Request) -> str:
+    return str(request.url)
+
+
+def get_simulated_key(request: Request, policy: CachePolicy) -> Optional[str]:
+    """The key `get_cache_key` would build, with namespace versions taken as constant.
+
+    Requests with a body are keyed on its hash, which access logs don't record, so they are not simulated.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    key = policy.get_key(request)
+    namespace = policy.get_namespace(request)
+    return key if namespace is None else f'{namespace}:{key}'
+
+
+def simulate(
+    records: Iterable[AccessRecord], policy: CachePolicy, configs: Sequence[SimulationConfig]
+) -> List[SimulationResult]:
+    """Replay records through one simulated cache per configuration in a single pass."""
+    caches = [SimulatedCache(SimulationResult(config)) for config in configs]
+    for record in records:
+        request = make_request(record)
+        key = get_simulated_key(request, policy) if is_cachable(request, policy) else None
+        for cache in caches:
+            result = cache.result
+            result.requests += 1
+            result.served_bytes += record.size
+            if key is not None and cache.lookup(key, record.timestamp):
+                result.hits += 1
+                continue
+            result.origin_requests += 1
+            result.origin_bytes += record.size
+            if key is not None:
+                cache.store(key, len(key) + record.size, record.timestamp)
+    return [cache.result for cache in caches]
+
+
+def format_results(results: Sequence[SimulationResult]) -> str:
+    header = ('ttl', 'capacity', 'eviction', 'requests', 'hit ratio', 'byte hit ratio', 'origin', 'peak memory')
+    rows = [header] + [
+        (
+            str(result.config.ttl),
+            'inf' if result.config.capacity is None else str(result.config.capacity),
+            result.config.eviction,
+            str(result.requests),
+            f'{result.hit_ratio:.2%}',
+            f'{result.byte_hit_ratio:.2%}',
+            str(result.origin_requests),
+            str(result.peak_memory),
+        )
+        for result in results
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return '\n'.join('  '.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def load_policy(path: str) -> CachePolicy:
+    module_name, _, attribute = path.partition(':')
+    policy = getattr(importlib.import_module(module_name), attribute)
+    assert isinstance(policy, CachePolicy), f'{path} is not a CachePolicy'
+    return policy
+
+
+def open_log(path: str) -> TextIO:
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt')
+    return open(path)
+
+
+def main(argv: Optional[Sequence[str]] = None, output: IO[str] = sys.stdout) -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m cachepot.simulator', description='Replay an access log through cache configurations.'
+    )
+    parser.add_argument('log', help='access log path, `-` for stdin; .gz files are decompressed')
+    parser.add_argument('--policy', help='CachePolicy to take keys, methods and ttl from, as `module:attribute`')
+    parser.add_argument('--ttl', nargs='+', type=int, help='TTLs in seconds (default: the policy ttl)')
+    parser.add_argument('--capacity', nargs='+', type=parse_size, default=[None], help='sizes like 64M or inf')
+    parser.add_argument('--eviction', nargs='+', choices=EVICTION_POLICIES, default=['lru'])
+    args = parser.parse_args(argv)
+
+    policy = load_policy(args.policy) if args.policy else CachePolicy(storage=DummyStorage(), key=url_key)
+    configs = [
+        SimulationConfig(ttl=ttl, capacity=capacity, eviction=eviction)
+        for ttl, capacity, eviction in itertools.product(args.ttl or [policy.ttl], args.capacity, args.eviction)
+    ]
+    skipped = SkippedLines()
+    with open_log(args.log) as log:
+        results = simulate(read_log(log, skipped), policy, configs)
+    print(format_results(results), file=output)
+    if skipped.count:
+        print(skipped, file=output)
+
+
+__all__ = (
+    'AccessRecord', 'SimulationConfig', 'SimulationResult', 'SimulatedCache', 'SkippedLines', 'read_log', 'simulate'
+)
+
+if __name__ == '__main__':
+    main()
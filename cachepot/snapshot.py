@@ -0,0 +1,117 @@
+"""Persist the in-process cache across restarts.
+
+A snapshot is a `MAGIC` header followed by one record per entry: a `>IIdd` header holding the key
+and value lengths, the wall-clock expiry (`NO_EXPIRY` if none) and the recorded compute cost,
+then the UTF-8 key and the raw value. Expiry is stored as wall-clock time so the TTL keeps
+running while the process is down, and entries that expired in the meantime are skipped on load.
+"""
+import asyncio
+import os
+import struct
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import IO, AsyncIterator, List, Tuple, Union
+
+from cachepot.storages.memory import MemoryStorage
+
+MAGIC = b'CACHEPOT-SNAPSHOT-1\n'
+NO_EXPIRY = -1.0
+_RECORD = struct.Struct('>IIdd')
+
+Path = Union[str, 'os.PathLike[str]']
+Record = Tuple[str, bytes, float, float]
+
+
+def _write(path: Path, records: List[Record]) -> None:
+    # A temporary file of its own, so workers sharing the snapshot path never write into the same file
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(MAGIC)
+            for key, value, expires_at, cost in records:
+                encoded_key = key.encode()
+                file.write(_RECORD.pack(len(encoded_key), len(value), expires_at, cost))
+                file.write(encoded_key)
+                file.write(value)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _read_batch(file: IO[bytes], size: int) -> List[Record]:
+    """Read up to `size` records, stopping at the first truncated or corrupt one."""
+    records: List[Record] = []
+    while len(records) < size and (header := file.read(_RECORD.size)):
+        if len(header) < _RECORD.size:
+            break
+        key_length, value_length, expires_at, cost = _RECORD.unpack(header)
+        key = file.read(key_length)
+        value = file.read(value_length)
+        if len(key) < key_length or len(value) < value_length:
+            break
+        try:
+            records.append((key.decode(), value, expires_at, cost))
+        except UnicodeDecodeError:
+            break
+    return records
+
+
+async def save_snapshot(storage: MemoryStorage, path: Path) -> int:
+    """Write the live entries of `storage` to `path` and return how many were written.
+
+    The file is written in a worker thread and atomically replaces any previous snapshot.
+    """
+    now = time.time()
+    records = [
+        (key, value, now + ttl if ttl is not None else NO_EXPIRY, cost)
+        for key, value, ttl, cost in storage.live_entries()
+    ]
+    await asyncio.get_running_loop().run_in_executor(None, _write, path, records)
+    return len(records)
+
+
+async def load_snapshot(storage: MemoryStorage, path: Path, batch_size: int = 1000) -> int:
+    """Restore unexpired entries from `path` and return how many were restored.
+
+    The file is read in batches in a worker thread, so the app keeps serving while it loads.
+    A missing file restores nothing, and a truncated or corrupt one restores the records before the damage.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return 0
+    restored = 0
+    with file:
+        if await loop.run_in_executor(None, file.read, len(MAGIC)) != MAGIC:
+            return 0
+        while records := await loop.run_in_executor(None, _read_batch, file, batch_size):
+            now = time.time()
+            for key, value, expires_at, cost in records:
+                ttl = expires_at - now if expires_at != NO_EXPIRY else None
+                restored += storage.restore(key, value, ttl, cost)
+    return restored
+
+
+@asynccontextmanager
+async def persist_snapshot(
+    storage: MemoryStorage, path: Path, background: bool = True
+) -> AsyncIterator['asyncio.Task[int]']:
+    """Restore `storage` from `path` on enter and snapshot it back on exit; use it in the app lifespan.
+
+    With `background`, startup doesn't wait for the restore; the yielded task resolves to the restored count.
+    """
+    task = asyncio.ensure_future(load_snapshot(storage, path))
+    if not background:
+        await task
+    try:
+        yield task
+    finally:
+        if not task.done():
+            task.cancel()
+        await save_snapshot(storage, path)
+
+
+__all__ = ('load_snapshot', 'persist_snapshot', 'save_snapshot')
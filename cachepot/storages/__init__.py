@@ -1,4 +1,8 @@
-__all__ = []
+from cachepot.storages.memcached import MemcachedStorage
+from cachepot.storages.memory import MemoryStorage
+from cachepot.storages.sharded import ShardedStorage
+
+__all__ = ['MemcachedStorage', 'MemoryStorage', 'ShardedStorage']
 
 try:
     from cachepot.storages.redis import RedisStorage
@@ -1,5 +1,6 @@
 import abc
-from typing import Optional
+import asyncio
+from typing import List, Mapping, Optional, Sequence, Tuple
 
 
 class AbstractStorage(abc.ABC):
@@ -15,3 +16,41 @@ class AbstractStorage(abc.ABC):
     @abc.abstractmethod
     async def delete(self, key: str) -> bool:
         raise NotImplementedError
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        """Reset the expiry of an existing key; False if the key is missing or touching isn't supported."""
+        return False
+
+    async def set_at_least(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        """Store a value that is identical for the key whenever it's written (e.g. content-addressed),
+        never shortening the lifetime of an existing copy. The default implementation always overwrites.
+        """
+        return await self.set(key, value, expire)
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        """Store the value only if the key doesn't exist and return whether it was stored.
+        The default implementation is not atomic; storages that can should override it.
+        """
+        if await self.get(key) is not None:
+            return False
+        return await self.set(key, value, expire)
+
+    async def get_with_reference(self, key: str, prefix: str) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """Get the value of `key` and the value it references.
+
+        The first line of the value is the reference; the referenced key is `prefix` followed by it.
+        Storages that can should fetch both in a single round trip.
+        """
+        value = await self.get(key)
+        if value is None or b'\n' not in value:
+            return value, None
+        return value, await self.get(prefix + value.split(b'\n', 1)[0].decode())
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return list(await asyncio.gather(*(self.get(key) for key in keys)))
+
+    async def set_many(self, items: Mapping[str, bytes], expire: Optional[int] = None) -> bool:
+        return all(await asyncio.gather(*(self.set(key, value, expire) for key, value in items.items())))
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        return sum(await asyncio.gather(*(self.delete(key) for key in keys)))
@@ -13,3 +13,6 @@ class DummyStorage(AbstractStorage):
 
     async def delete(self, key: str) -> bool:
         return True
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        return True
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import struct
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from cachepot.storages.abstract import AbstractStorage
+from cachepot.storages.sharded import HashRing
+
+HEADER = struct.Struct('>BBHBBHIIQ')
+REQUEST_MAGIC = 0x80
+RESPONSE_MAGIC = 0x81
+
+GET = 0x00
+SET = 0x01
+ADD = 0x02
+DELETE = 0x04
+NOOP = 0x0a
+GETKQ = 0x0d
+SETQ = 0x11
+DELETEQ = 0x14
+TOUCH = 0x1c
+
+STATUS_OK = 0x00
+STATUS_KEY_NOT_FOUND = 0x01
+
+MAX_KEY_LENGTH = 250
+# Memcached reads expirations longer than 30 days as Unix timestamps
+MAX_RELATIVE_EXPIRE = 30 * 24 * 60 * 60
+# Suffix of the record holding the Unix expiry (0 for none) of `set_at_least` values
+EXPIRES_AT_SUFFIX = ':expires_at'
+
+
+class MemcachedError(Exception):
+    pass
+
+
+class Response:
+    __slots__ = ('opcode', 'status', 'opaque', 'key', 'value')
+
+    def __init__(self, opcode: int, status: int, opaque: int, key: bytes, value: bytes):
+        self.opcode = opcode
+        self.status = status
+        self.opaque = opaque
+        self.key = key
+        self.value = value
+
+
+def pack_request(opcode: int, key: bytes = b'', value: bytes = b'', extras: bytes = b'', opaque: int = 0) -> bytes:
+    body_length = len(extras) + len(key) + len(value)
+    header = HEADER.pack(REQUEST_MAGIC, opcode, len(key), len(extras), 0, 0, body_length, opaque, 0)
+    return header + extras + key + value
+
+
+def encode_key(key: str) -> bytes:
+    """Encode a key, replacing keys over the memcached length limit by a hash of them."""
+    encoded = key.encode()
+    if len(encoded) > MAX_KEY_LENGTH:
+        return b'cachepot:' + hashlib.blake2b(encoded, digest_size=32).hexdigest().encode()
+    return encoded
+
+
+def encode_expire(expire: Optional[int]) -> int:
+    if not expire:
+        return 0
+    return int(time.time()) + expire if expire > MAX_RELATIVE_EXPIRE else expire
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, data: bytes) -> None:
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def receive(self) -> Response:
+        header = await self.reader.readexactly(HEADER.size)
+        magic, opcode, key_length, extras_length, _, status, body_length, opaque, _ = HEADER.unpack(header)
+        if magic != RESPONSE_MAGIC:
+            raise MemcachedError(f'Unexpected response magic {magic:#x}')
+        body = await self.reader.readexactly(body_length)
+        key = body[extras_length:extras_length + key_length]
+        return Response(opcode, status, opaque, key, body[extras_length + key_length:])
+
+    async def receive_until_noop(self) -> List[Response]:
+        """Collect the responses of quiet commands up to the closing NOOP."""
+        responses = []
+        while (response := await self.receive()).opcode != NOOP:
+            responses.append(response)
+        return responses
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """At most `size` connections to one server, opened on demand and reused.
+
+    A connection that fails or is cancelled mid-command is closed instead of being returned,
+    so a half-read response can never be picked up by the next command.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 10, connect_timeout: Optional[float] = None):
+        assert size > 0, 'size must be positive'
+        self.host = host
+        self.port = port
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self._idle: List[Connection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Connection]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        async with self._semaphore:
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.connect_timeout
+                )
+                connection = Connection(reader, writer)
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            self._idle.append(connection)
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+
+class MemcachedStorage(AbstractStorage):
+    """Memcached storage over the binary protocol.
+
+    `servers` are `host:port` addresses; keys are spread over them with consistent hashing.
+    Batched operations send quiet commands (GETKQ, SETQ, DELETEQ) followed by a NOOP, so each
+    server involved is reached in a single round trip, and the servers are queried concurrently.
+    Memcached can't report the remaining TTL of a key, so `set_at_least` keeps the expiry of the value
+    in a small record next to it, on the same server, and only extends the value when it would expire earlier.
+    """
+
+    def __init__(
+        self,
+        servers: Sequence[str] = ('127.0.0.1:11211',),
+        pool_size: int = 10,
+        connect_timeout: Optional[float] = None,
+        vnodes: int = 160,
+    ):
+        assert servers, 'At least one server is required'
+        pools = {}
+        for server in servers:
+            host, _, port = server.rpartition(':')
+            pools[server] = ConnectionPool(host, int(port), size=pool_size, connect_timeout=connect_timeout)
+        self.ring: HashRing[ConnectionPool] = HashRing(pools, vnodes=vnodes)
+
+    def _group(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for key in keys:
+            groups.setdefault(self.ring.get_name(key), []).append(key)
+        return groups
+
+    async def _call(self, key: str, request: bytes) -> Response:
+        async with self.ring.get_node(key).connection() as connection:
+            await connection.send(request)
+            return await connection.receive()
+
+    async def _call_quietly(self, server: str, requests: Iterable[bytes]) -> List[Response]:
+        async with self.ring.nodes[server].connection() as connection:
+            await connection.send(b''.join(requests) + pack_request(NOOP))
+            return await connection.receive_until_noop()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        response = await self._call(key, pack_request(GET, encode_key(key)))
+        return response.value if response.status == STATUS_OK else None
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        extras = struct.pack('>II', 0, encode_expire(expire))
+        response = await self._call(key, pack_request(SET, encode_key(key), value, extras))
+        return response.status == STATUS_OK
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        extras = struct.pack('>II', 0, encode_expire(expire))
+        response = await self._call(key, pack_request(ADD, encode_key(key), value, extras))
+        return response.status == STATUS_OK
+
+    async def set_at_least(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        expires_at = int(time.time()) + expire if expire else 0
+        encoded_key, record_key = encode_key(key), encode_key(key + EXPIRES_AT_SUFFIX)
+        extras = struct.pack('>II', 0, encode_expire(expire))
+        async with self.ring.get_node(key).connection() as connection:
+            await connection.send(pack_request(ADD, encoded_key, value, extras) + pack_request(GET, record_key))
+            added, record = await connection.receive(), await connection.receive()
+            if added.status != STATUS_OK:
+                current = int(record.value) if record.status == STATUS_OK else None
+                if current is not None and (current == 0 or (expires_at and current >= expires_at)):
+                    return True
+                touch_extras = struct.pack('>I', encode_expire(expire))
+                await connection.send(pack_request(TOUCH, encoded_key, extras=touch_extras))
+                if (await connection.receive()).status != STATUS_OK:
+                    await connection.send(pack_request(SET, encoded_key, value, extras))
+                    await connection.receive()
+            await connection.send(pack_request(SET, record_key, str(expires_at).encode(), extras))
+            return (await connection.receive()).status == STATUS_OK
+
+    async def delete(self, key: str) -> bool:
+        response = await self._call(key, pack_request(DELETE, encode_key(key)))
+        return response.status == STATUS_OK
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        extras = struct.pack('>I', encode_expire(expire))
+        response = await self._call(key, pack_request(TOUCH, encode_key(key), extras=extras))
+        return response.status == STATUS_OK
+
+    async def _get_from(self, server: str, keys: List[str]) -> Dict[str, bytes]:
+        responses = await self._call_quietly(
+            server, (pack_request(GETKQ, encode_key(key), opaque=index) for index, key in enumerate(keys))
+        )
+        return {keys[response.opaque]: response.value for response in responses if response.status == STATUS_OK}
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        values: Dict[str, bytes] = {}
+        for found in await asyncio.gather(
+            *(self._get_from(server, server_keys) for server, server_keys in self._group(set(keys)).items())
+        ):
+            values.update(found)
+        return [values.get(key) for key in keys]
+
+    async def set_many(self, items: Mapping[str, bytes], expire: Optional[int] = None) -> bool:
+        extras = struct.pack('>II', 0, encode_expire(expire))
+        failures = await asyncio.gather(*(
+            self._call_quietly(server, (pack_request(SETQ, encode_key(key), items[key], extras) for key in keys))
+            for server, keys in self._group(items).items()
+        ))
+        return not any(failures)
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        groups = self._group(set(keys))
+        failures = await asyncio.gather(*(
+            self._call_quietly(server, (pack_request(DELETEQ, encode_key(key)) for key in server_keys))
+            for server, server_keys in groups.items()
+        ))
+        return sum(len(server_keys) for server_keys in groups.values()) - sum(map(len, failures))
+
+    def close(self) -> None:
+        """Close the idle connections of every server."""
+        for pool in self.ring.nodes.values():
+            pool.close()
+
@@ -0,0 +1,247 @@
+import heapq
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cachepot.storages.abstract import AbstractStorage
+
+
+class FrequencySketch:
+    """Count-min sketch of recent access frequencies, as used by TinyLFU admission.
+
+    Counters saturate at 15 and are halved every `sample_size` increments,
+    so the estimates follow the recent popularity of keys instead of all-time counts.
+    """
+
+    max_count = 15
+
+    def __init__(self, width: int, depth: int = 4, sample_size: Optional[int] = None):
+        assert width > 0 and depth > 0, 'width and depth must be positive'
+        self.width = width
+        self.rows = [bytearray(width) for _ in range(depth)]
+        self.sample_size = sample_size or width * 10
+        self.additions = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        first = hash(key)
+        second = (first >> 17) | 1
+        return [(first + i * second) % self.width for i in range(len(self.rows))]
+
+    def increment(self, key: str) -> None:
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < self.max_count:
+                row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def _reset(self) -> None:
+        for row in self.rows:
+            for index, count in enumerate(row):
+                row[index] = count >> 1
+        self.additions //= 2
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'cost', 'size', 'priority', 'version')
+
+    def __init__(self, value: bytes, expires_at: Optional[float], cost: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.cost = cost
+        self.size = size
+        self.priority = 0.0
+        self.version = 0
+
+    def is_expired(self, now: float) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+
+class MemoryStorage(AbstractStorage):
+    """Bounded in-process storage with cost-aware eviction and frequency-based admission.
+
+    Eviction follows GreedyDual-Size: an entry's priority is the current inflation value
+    plus its compute cost per byte, so cheap or large entries leave first, and the inflation
+    value rises to each evicted priority, ageing out entries that are no longer requested.
+    The compute cost is the time between a missed `get` and the `set` of the same key,
+    which is exactly the time spent recomputing the response.
+
+    When the storage is full, a new key is admitted only if the TinyLFU frequency sketch
+    estimates it as more popular than the entries it would evict, so a scan of one-hit
+    keys can't flush the hot set.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 64 * 1024 * 1024,
+        admission: bool = True,
+        default_cost: float = 0.001,
+        sketch_width: int = 4096,
+    ):
+        assert max_size > 0, 'max_size must be positive'
+        self.max_size = max_size
+        self.admission = admission
+        self.default_cost = default_cost
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        self._inflation = 0.0
+        self._sketch = FrequencySketch(sketch_width)
+        self._missed_at: 'OrderedDict[str, float]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _push(self, key: str, entry: _Entry) -> None:
+        self._counter += 1
+        entry.version = self._counter
+        entry.priority = self._inflation + entry.cost / entry.size
+        heapq.heappush(self._heap, (entry.priority, self._counter, key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (item.priority, item.version, item_key) for item_key, item in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+    def _record_miss(self, key: str, now: float) -> None:
+        self.misses += 1
+        self._missed_at[key] = now
+        self._missed_at.move_to_end(key)
+        if len(self._missed_at) > 10000:
+            self._missed_at.popitem(last=False)
+
+    def _victims(self, key: str, needed: int, now: float) -> Optional[List[str]]:
+        """Pick entries to free `needed` bytes, or None if the candidate shouldn't be admitted."""
+        popped = []
+        victims: List[str] = []
+        freed = 0
+        admitted = True
+        candidate_frequency = self._sketch.estimate(key)
+        while freed < needed and self._heap:
+            item = heapq.heappop(self._heap)
+            popped.append(item)
+            _, version, victim_key = item
+            victim = self._entries.get(victim_key)
+            if victim is None or victim.version != version:
+                continue
+            if (
+                self.admission
+                and not victim.is_expired(now)
+                and self._sketch.estimate(victim_key) >= candidate_frequency
+            ):
+                admitted = False
+                break
+            victims.append(victim_key)
+            freed += victim.size
+        if not admitted:
+            for item in popped:
+                heapq.heappush(self._heap, item)
+            return None
+        return victims
+
+    async def get(self, key: str) -> Optional[bytes]:
+        now = monotonic()
+        self._sketch.increment(key)
+        entry = self._entries.get(key)
+        if entry is None or entry.is_expired(now):
+            if entry is not None:
+                self._remove(key)
+            self._record_miss(key, now)
+            return None
+        self.hits += 1
+        self._push(key, entry)
+        return entry.value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        now = monotonic()
+        missed_at = self._missed_at.pop(key, None)
+        cost = max(now - missed_at, self.default_cost) if missed_at is not None else self.default_cost
+        entry = _Entry(
+            value=value,
+            expires_at=now + expire if expire is not None else None,
+            cost=cost,
+            size=len(key) + len(value),
+        )
+        if entry.size > self.max_size:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        needed = self.size + entry.size - self.max_size
+        if needed > 0:
+            victims = self._victims(key, needed, now)
+            if victims is None:
+                self.rejections += 1
+                return False
+            for victim_key in victims:
+                self._inflation = max(self._inflation, self._entries[victim_key].priority)
+                self._remove(victim_key)
+                self.evictions += 1
+        self._entries[key] = entry
+        self.size += entry.size
+        self._push(key, entry)
+        return True
+
+    async def set_at_least(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        entry = self._entries.get(key)
+        if entry is not None and (
+            entry.expires_at is None or (expire is not None and entry.expires_at >= monotonic() + expire)
+        ):
+            return True
+        return await self.set(key, value, expire)
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        entry = self._entries.get(key)
+        if entry is not None and not entry.is_expired(monotonic()):
+            return False
+        return await self.set(key, value, expire)
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        now = monotonic()
+        entry = self._entries.get(key)
+        if entry is None or entry.is_expired(now):
+            return False
+        entry.expires_at = now + expire if expire is not None else None
+        return True
+
+    async def delete(self, key: str) -> bool:
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def live_entries(self) -> Iterator[Tuple[str, bytes, Optional[float], float]]:
+        """Yield `(key, value, remaining ttl, cost)` of every unexpired entry, from a copy of the entry table."""
+        now = monotonic()
+        for key, entry in list(self._entries.items()):
+            if not entry.is_expired(now):
+                ttl = entry.expires_at - now if entry.expires_at is not None else None
+                yield key, entry.value, ttl, entry.cost
+
+    def restore(self, key: str, value: bytes, ttl: Optional[float], cost: float) -> bool:
+        """Insert a snapshotted entry with its recorded cost, keeping any value stored since startup."""
+        if key in self._entries or (ttl is not None and ttl <= 0):
+            return False
+        entry = _Entry(
+            value=value,
+            expires_at=monotonic() + ttl if ttl is not None else None,
+            cost=cost,
+            size=len(key) + len(value),
+        )
+        if self.size + entry.size > self.max_size:
+            return False
+        self._entries[key] = entry
+        self.size += entry.size
+        self._push(key, entry)
+        return True
@@ -1,16 +1,111 @@
-from typing import Optional
+from enum import Enum
+from time import monotonic
+from typing import List, Mapping, Optional, Sequence, Tuple
 
 from redis.asyncio.client import Redis
+from redis.commands.core import AsyncScript
 
 from cachepot.storages.abstract import AbstractStorage
 
 
+class ReadStrategy(str, Enum):
+    ROUND_ROBIN = 'round_robin'
+    LOWEST_LATENCY = 'lowest_latency'
+
+
+# The referenced key is built inside the script, so it isn't declared in KEYS: fine for a single
+# server, but Redis Cluster (or a proxy routing on KEYS) can't know it lives on another slot
+GET_WITH_REFERENCE_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return {false, false}
+end
+local newline = string.find(value, '\\n', 1, true)
+if not newline then
+    return {value, false}
+end
+return {value, redis.call('GET', ARGV[1] .. string.sub(value, 1, newline - 1))}
+"""
+
+SET_AT_LEAST_SCRIPT = """
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl == -1 or (ARGV[2] ~= '' and ttl >= tonumber(ARGV[2]) * 1000) then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('SET', KEYS[1], ARGV[1])
+else
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+return 1
+"""
+
+
 class RedisStorage(AbstractStorage):
-    def __init__(self, redis: 'Redis[bytes]'):
+    """Redis storage, optionally reading from replicas.
+
+    Writes and deletes always go to the primary `redis` client. With `replicas` passed, reads go to
+    a replica picked by `read_strategy`; a replica error falls back to the primary and takes the replica
+    out of rotation for `replica_down_time` seconds. With `fallback_to_primary`, a replica miss is retried
+    on the primary to hide replication lag.
+
+    `get_with_reference` fetches a deduplicated entry and its body in one round trip with a Lua script
+    on the primary. The script reads a key it doesn't declare, so it isn't supported on Redis Cluster.
+    With replicas, the two keys are instead read one after the other through the replica routing above.
+    """
+
+    latency_smoothing = 0.2
+    replica_down_time = 5.0
+
+    def __init__(
+        self,
+        redis: 'Redis[bytes]',
+        replicas: Sequence['Redis[bytes]'] = (),
+        read_strategy: ReadStrategy = ReadStrategy.ROUND_ROBIN,
+        fallback_to_primary: bool = False,
+    ):
         assert isinstance(redis, Redis), 'Invalid Redis client passed'
+        assert all(isinstance(replica, Redis) for replica in replicas), 'Invalid Redis replica client passed'
         self.redis: Redis[bytes] = redis
+        self.replicas: List[Redis[bytes]] = list(replicas)
+        self.read_strategy: ReadStrategy = ReadStrategy(read_strategy)
+        self.fallback_to_primary: bool = fallback_to_primary
+        self.latencies: List[float] = [0.0] * len(self.replicas)
+        self._down_until: List[float] = [0.0] * len(self.replicas)
+        self._next_replica: int = 0
+        self._get_with_reference: AsyncScript = redis.register_script(GET_WITH_REFERENCE_SCRIPT)
+        self._set_at_least: AsyncScript = redis.register_script(SET_AT_LEAST_SCRIPT)
+
+    def _pick_replica(self) -> Optional[int]:
+        now = monotonic()
+        available = [index for index, down_until in enumerate(self._down_until) if down_until <= now]
+        if not available:
+            return None
+        if self.read_strategy == ReadStrategy.LOWEST_LATENCY:
+            return min(available, key=self.latencies.__getitem__)
+        index = next((index for index in available if index >= self._next_replica), available[0])
+        self._next_replica = (index + 1) % len(self.replicas)
+        return index
+
+    def _record_latency(self, index: int, latency: float) -> None:
+        self.latencies[index] += self.latency_smoothing * (latency - self.latencies[index])
+
+    async def _read_replica(self, keys: Sequence[str]) -> Optional[List[Optional[bytes]]]:
+        index = self._pick_replica()
+        if index is None:
+            return None
+        started = monotonic()
+        try:
+            values = await self.replicas[index].mget(keys)
+        except Exception:
+            self._down_until[index] = monotonic() + self.replica_down_time
+            return None
+        self._record_latency(index, monotonic() - started)
+        return [bytes(data) if data is not None else None for data in values]
 
     async def get(self, key: str) -> Optional[bytes]:
+        if self.replicas:
+            return (await self.get_many([key]))[0]
         data = await self.redis.get(key)
         if data and not isinstance(data, bytes):
             return bytes(data)
@@ -22,3 +117,49 @@ class RedisStorage(AbstractStorage):
 
     async def delete(self, key: str) -> bool:
         return bool(await self.redis.delete(key))
+
+    async def set_at_least(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        await self._set_at_least(keys=[key], args=[value, '' if expire is None else expire])
+        return True
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        return bool(await self.redis.set(key, value, ex=expire, nx=True))
+
+    async def get_with_reference(self, key: str, prefix: str) -> Tuple[Optional[bytes], Optional[bytes]]:
+        if self.replicas:
+            return await super().get_with_reference(key, prefix)
+        value, reference = await self._get_with_reference(keys=[key], args=[prefix])
+        return (
+            bytes(value) if value is not None else None,
+            bytes(reference) if reference is not None else None,
+        )
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        if expire is None:
+            await self.redis.persist(key)
+            return bool(await self.redis.exists(key))
+        return bool(await self.redis.expire(key, expire))
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        values = await self._read_replica(keys) if self.replicas else None
+        if values is None:
+            return [bytes(data) if data is not None else None for data in await self.redis.mget(keys)]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if self.fallback_to_primary and missing:
+            for index, data in zip(missing, await self.redis.mget([keys[index] for index in missing])):
+                values[index] = bytes(data) if data is not None else None
+        return values
+
+    async def set_many(self, items: Mapping[str, bytes], expire: Optional[int] = None) -> bool:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+        return True
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        if not keys:
+            return 0
+        return int(await self.redis.delete(*keys))
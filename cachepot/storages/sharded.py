@@ -0,0 +1,118 @@
+import asyncio
+import bisect
+import hashlib
+from typing import Dict, Generic, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from cachepot.storages.abstract import AbstractStorage
+
+T = TypeVar('T')
+
+
+class HashRing(Generic[T]):
+    """Consistent hash ring with virtual nodes.
+
+    Each node owns `vnodes` points on the ring, and a key belongs to the node of the first point
+    after the key's hash, so adding or removing a node only moves the keys of that node.
+    """
+
+    def __init__(self, nodes: Optional[Mapping[str, T]] = None, vnodes: int = 160):
+        assert vnodes > 0, 'vnodes must be positive'
+        self.vnodes = vnodes
+        self.nodes: Dict[str, T] = {}
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for name, node in (nodes or {}).items():
+            self.add_node(name, node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+    def add_node(self, name: str, node: T) -> None:
+        assert name not in self.nodes, f'Node {name!r} is already on the ring'
+        self.nodes[name] = node
+        for i in range(self.vnodes):
+            point = self._hash(f'{name}#{i}')
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, name)
+
+    def remove_node(self, name: str) -> T:
+        node = self.nodes.pop(name)
+        ring = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != name]
+        self._points = [point for point, _ in ring]
+        self._owners = [owner for _, owner in ring]
+        return node
+
+    def get_name(self, key: str) -> str:
+        assert self._points, 'The ring has no nodes'
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
+
+    def get_node(self, key: str) -> T:
+        return self.nodes[self.get_name(key)]
+
+
+class ShardedStorage(AbstractStorage):
+    """Spreads keys over several storages with consistent hashing.
+
+    Batched operations are grouped per shard and the shards are queried concurrently.
+    """
+
+    def __init__(self, storages: Mapping[str, AbstractStorage], vnodes: int = 160):
+        assert storages, 'At least one storage is required'
+        self.ring: HashRing[AbstractStorage] = HashRing(storages, vnodes=vnodes)
+
+    def add_storage(self, name: str, storage: AbstractStorage) -> None:
+        self.ring.add_node(name, storage)
+
+    def remove_storage(self, name: str) -> AbstractStorage:
+        return self.ring.remove_node(name)
+
+    def _group(self, keys: Sequence[str]) -> Dict[str, List[Tuple[int, str]]]:
+        groups: Dict[str, List[Tuple[int, str]]] = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(self.ring.get_name(key), []).append((index, key))
+        return groups
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.ring.get_node(key).get(key)
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        return await self.ring.get_node(key).set(key, value, expire)
+
+    async def delete(self, key: str) -> bool:
+        return await self.ring.get_node(key).delete(key)
+
+    async def set_at_least(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        return await self.ring.get_node(key).set_at_least(key, value, expire)
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        return await self.ring.get_node(key).set_if_absent(key, value, expire)
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        return await self.ring.get_node(key).touch(key, expire)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        groups = self._group(keys)
+        shard_results = await asyncio.gather(*(
+            self.ring.nodes[name].get_many([key for _, key in group]) for name, group in groups.items()
+        ))
+        results: List[Optional[bytes]] = [None] * len(keys)
+        for group, values in zip(groups.values(), shard_results):
+            for (index, _), value in zip(group, values):
+                results[index] = value
+        return results
+
+    async def set_many(self, items: Mapping[str, bytes], expire: Optional[int] = None) -> bool:
+        groups = self._group(list(items))
+        return all(await asyncio.gather(*(
+            self.ring.nodes[name].set_many({key: items[key] for _, key in group}, expire)
+            for name, group in groups.items()
+        )))
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        groups = self._group(keys)
+        return sum(await asyncio.gather(*(
+            self.ring.nodes[name].delete_many([key for _, key in group]) for name, group in groups.items()
+        )))
@@ -1,57 +1,421 @@
 import asyncio
 import email
+import inspect
 import json
+import secrets
+from collections import OrderedDict
 from contextlib import AsyncExitStack
-from typing import Optional, Union, Type, Any, Callable, Coroutine, Dict, cast
+from time import monotonic
+from typing import Optional, Union, Type, Any, Callable, Coroutine, Dict, Awaitable, List, Tuple, TypeVar, cast
+from weakref import WeakKeyDictionary
 
 from fastapi import params
 from fastapi._compat import ModelField, Undefined, _normalize_errors
 from fastapi.datastructures import DefaultPlaceholder, Default
 from fastapi.dependencies.models import Dependant
 from fastapi.dependencies.utils import solve_dependencies
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.exceptions import RequestValidationError
 from fastapi.routing import run_endpoint_function, serialize_response
 from fastapi.types import IncEx
 from fastapi.utils import is_body_allowed_for_status_code
+from starlette.datastructures import FormData
 from starlette.exceptions import HTTPException
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
 
-from cachepot.constants import CachePolicy
-from cachepot.encoders import ResponseEncoder
+from cachepot.constants import BatchPolicy, CachePolicy
+from cachepot.encoders import ResponseEncoder, content_hash
+from cachepot.limiter import ConcurrencyLimiter, OriginOverloaded
+from cachepot.offload import run_sized
+from cachepot.ranges import apply_range
+from cachepot.refresh import REFRESH_SCOPE_KEY
+from cachepot.shadow import ShadowStats
+from cachepot.storages.abstract import AbstractStorage
+
+T = TypeVar('T')
+
+# Only 200 responses count as empty results: 204, 301, 308 and the like are bodiless by design
+EMPTY_BODIES = frozenset({b'', b'[]', b'{}', b'null'})
 
 
 def is_cachable(request: Request, cache_policy: Optional[CachePolicy]) -> bool:
     return bool(
-        request.method == 'GET'
-        and cache_policy
+        cache_policy
+        and request.method in cache_policy.methods
         and cache_policy.is_active
         and (not cache_policy.respect_no_cache or request.headers.get('cache-control') != 'no-cache')
     )
 
 
-async def get_cached_response(request: Request, cache_policy: Optional[CachePolicy]) -> Optional[Response]:
+def is_negative_response(response: Response, policy: CachePolicy) -> bool:
+    """Whether the response is an expected miss: a "not found" status or an empty 200 result."""
+    return response.status_code in policy.negative_status_codes or (
+        response.status_code == 200
+        and response.status_code in policy.cacheable_status_codes
+        and response.body.strip() in EMPTY_BODIES
+    )
+
+
+def is_cachable_response(response: Response, policy: CachePolicy) -> bool:
+    if is_negative_response(response, policy):
+        return policy.negative_ttl is not None
+    return response.status_code in policy.cacheable_status_codes
+
+
+async def call_storage(policy: CachePolicy, operation: Callable[[], Awaitable[T]], default: T) -> T:
+    """Run a storage operation within the policy deadline and circuit breaker."""
+    breaker = policy.circuit_breaker
+    if breaker is None and policy.storage_timeout is None:
+        return await operation()
+    if breaker and not breaker.allow():
+        return default
+    started = monotonic()
+    try:
+        result = await asyncio.wait_for(operation(), timeout=policy.storage_timeout)
+    except Exception:
+        if breaker:
+            breaker.record(False, monotonic() - started)
+        return default
+    except BaseException:
+        if breaker:
+            breaker.abandon()
+        raise
+    if breaker:
+        breaker.record(True, monotonic() - started)
+    return result
+
+
+async def storage_get(policy: CachePolicy, key: str) -> Optional[bytes]:
+    return await call_storage(policy, lambda: policy.storage.get(key), default=None)
+
+
+async def storage_set(policy: CachePolicy, key: str, value: bytes, expire: Optional[int]) -> bool:
+    return await call_storage(policy, lambda: policy.storage.set(key=key, value=value, expire=expire), default=False)
+
+
+def canonical_body_hash(body: Any) -> Optional[str]:
+    """Hash the parsed request body so that key order and whitespace don't change the result.
+
+    Returns None for bodies that can't be keyed reliably, such as forms with file uploads.
+    """
+    if body is None:
+        data = b''
+    elif isinstance(body, bytes):
+        data = body
+    elif isinstance(body, FormData):
+        items = body.multi_items()
+        if not all(isinstance(value, str) for _, value in items):
+            return None
+        data = json.dumps(sorted(items)).encode()
+    else:
+        data = json.dumps(body, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+    return content_hash(data)
+
+
+# Namespace versions recently read from each storage: namespace -> (version, read at), least recently used first.
+# Per-tenant namespaces are unbounded, so at most NAMESPACE_CACHE_SIZE of them are kept per storage.
+NAMESPACE_CACHE_SIZE = 1024
+_namespace_versions: 'WeakKeyDictionary[AbstractStorage, OrderedDict[str, Tuple[str, float]]]' = WeakKeyDictionary()
+
+
+def _cached_namespace_version(policy: CachePolicy, namespace: str) -> Optional[str]:
+    versions = _namespace_versions.get(policy.storage)
+    if versions is None or (cached := versions.get(namespace)) is None:
+        return None
+    if monotonic() - cached[1] >= policy.namespace_cache_ttl:
+        del versions[namespace]
+        return None
+    versions.move_to_end(namespace)
+    return cached[0]
+
+
+def _remember_namespace_version(policy: CachePolicy, namespace: str, version: str) -> None:
+    versions = _namespace_versions.setdefault(policy.storage, OrderedDict())
+    versions[namespace] = (version, monotonic())
+    versions.move_to_end(namespace)
+    while len(versions) > NAMESPACE_CACHE_SIZE:
+        versions.popitem(last=False)
+
+
+def _namespace_version_key(namespace: str) -> str:
+    return f'cachepot:namespace:{namespace}'
+
+
+async def get_namespace_version(policy: CachePolicy, namespace: str) -> Optional[str]:
+    """Return the current namespace version, caching it in process for `policy.namespace_cache_ttl` seconds.
+
+    A missing version is created with a set-if-absent write, so concurrent creators agree on one version.
+    Returns None if the version can't be read, e.g. on a timeout or an open breaker: guessing a new one
+    would orphan every entry of the namespace.
+    """
+    if (cached := _cached_namespace_version(policy, namespace)) is not None:
+        return cached
+    version_key = _namespace_version_key(namespace)
+
+    async def read() -> Tuple[Optional[bytes]]:
+        return (await policy.storage.get(version_key),)
+
+    for _ in range(2):
+        if (result := await call_storage(policy, read, default=None)) is None:
+            return None
+        if (data := result[0]) is not None:
+            version = data.decode()
+            break
+        version = secrets.token_hex(6)
+        if await call_storage(
+            policy, lambda: policy.storage.set_if_absent(version_key, version.encode()), default=False
+        ):
+            break
+    else:
+        return None
+    _remember_namespace_version(policy, namespace, version)
+    return version
+
+
+async def bump_namespace(policy: CachePolicy, namespace: Optional[str] = None) -> str:
+    """Make every entry of the namespace unreachable with a single write; old entries expire by their TTL.
+
+    Other processes pick up the new version within `policy.namespace_cache_ttl` seconds.
+    """
+    namespace = namespace or policy.get_namespace()
+    assert namespace is not None, 'No namespace to bump'
+    version = secrets.token_hex(6)
+    await policy.storage.set(key=_namespace_version_key(namespace), value=version.encode())
+    _remember_namespace_version(policy, namespace, version)
+    return version
+
+
+async def apply_namespace(policy: CachePolicy, key: str, request: Optional[Request] = None) -> Optional[str]:
+    """Prefix the key with the namespace version; None if the version is unavailable and the cache must be skipped."""
+    if (namespace := policy.get_namespace(request)) is None:
+        return key
+    if (version := await get_namespace_version(policy, namespace)) is None:
+        return None
+    return f'{namespace}:{version}:{key}'
+
+
+async def render_http_exception(request: Request, exc: HTTPException) -> Response:
+    """Render `exc` with the handler the app registered for it, as Starlette's ExceptionMiddleware would."""
+    app = request.scope.get('app')
+    handlers: Dict[Any, Callable[..., Any]] = getattr(app, 'exception_handlers', None) or {}
+    handler = handlers.get(exc.status_code) or next(
+        (handlers[cls] for cls in type(exc).__mro__ if cls in handlers), None
+    )
+    if handler is None:
+        return await http_exception_handler(request, exc)
+    response = handler(request, exc)
+    if inspect.isawaitable(response):
+        response = await response
+    return cast(Response, response)
+
+
+async def get_cache_key(request: Request, policy: CachePolicy, body: Any = None) -> Optional[str]:
+    key = policy.get_key(request=request)
+    if request.method not in ('GET', 'HEAD'):
+        if (body_hash := canonical_body_hash(body)) is None:
+            return None
+        key = f'{key}:{request.url.path}:{body_hash}'
+    return await apply_namespace(policy, key, request)
+
+
+BODY_KEY_PREFIX = 'cachepot:body:'
+LIMITER_SLOT_SCOPE_KEY = 'cachepot.limiter_slot'
+# The key this request already looked up and found absent, so storing it skips `touch_unchanged`
+MISSED_KEY_SCOPE_KEY = 'cachepot.missed_key'
+
+
+async def load_entry(policy: CachePolicy, key: str) -> Tuple[Optional[ResponseEncoder], int]:
+    """Load a stored response and its stored size, following the body reference of deduplicated entries."""
+    if not policy.deduplicate_bodies:
+        data = await storage_get(policy, key)
+        if not data:
+            return None, 0
+        entry = await run_sized(policy.offload_threshold, len(data), ResponseEncoder.model_validate_json, data)
+        return entry, len(data)
+
+    missing: Tuple[Optional[bytes], Optional[bytes]] = (None, None)
+    pointer, body = await call_storage(
+        policy, lambda: policy.storage.get_with_reference(key, BODY_KEY_PREFIX), default=missing
+    )
+    if pointer is None or body is None:
+        return None, 0
+    entry = ResponseEncoder.model_validate_json(pointer.split(b'\n', 1)[1])
+    entry.body = body
+    return entry, len(pointer) + len(body)
+
+
+async def store_entry(policy: CachePolicy, key: str, entry: ResponseEncoder, ttl: Optional[int]) -> int:
+    """Store a response and return the number of bytes written.
+
+    With `policy.deduplicate_bodies`, the key only holds a pointer record (status, headers and body hash)
+    and the body is stored once under its content hash, living at least as long as any pointer to it.
+    """
+    if not policy.deduplicate_bodies:
+        data = await run_sized(policy.offload_threshold, len(entry.body), entry.cache_data)
+        await storage_set(policy, key=key, value=data, expire=ttl)
+        return len(data)
+
+    body_hash = await run_sized(policy.offload_threshold, len(entry.body), content_hash, entry.body)
+    pointer = body_hash.encode() + b'\n' + entry.model_copy(update={'body': b''}).cache_data()
+    await call_storage(
+        policy, lambda: policy.storage.set_at_least(BODY_KEY_PREFIX + body_hash, entry.body, ttl), default=False
+    )
+    await storage_set(policy, key=key, value=pointer, expire=ttl)
+    return len(pointer) + len(entry.body)
+
+
+async def get_cached_response(
+    request: Request, cache_policy: Optional[CachePolicy], body: Any = None
+) -> Optional[Response]:
     if is_cachable(request, cache_policy):
         policy = cast(CachePolicy, cache_policy)
-        key = policy.get_key(request=request)
-        if data := await policy.storage.get(key):
-            response = ResponseEncoder.model_validate_json(data)
+        key = await get_cache_key(request, policy, body)
+        if key is None or request.scope.get(REFRESH_SCOPE_KEY):
+            return None
+        if policy.membership_filter and not policy.membership_filter.might_contain(key):
+            entry, size = None, 0
+        else:
+            entry, size = await load_entry(policy, key)
+        if policy.analytics:
+            policy.analytics.record_lookup(policy.label, key, size if entry else None)
+        if entry:
+            if policy.refresh_ahead:
+                policy.refresh_ahead.record_hit(key)
+            response = entry
             if policy.cached_response_header:
                 response.headers.update({policy.cached_response_header: 'true'})
+            if policy.http_cache:
+                response.headers.update(policy.http_cache.get_headers(ttl=response.ttl, age=response.age))
+            if policy.serve_ranges:
+                response = apply_range(request, response)
 
             return response.decode()
+        request.scope[MISSED_KEY_SCOPE_KEY] = key
     return None
 
 
-async def cache_response(request: Request, response: Response, cache_policy: Optional[CachePolicy]) -> Response:
-    if is_cachable(request, cache_policy):
-        policy = cast(CachePolicy, cache_policy)
-        response_data = ResponseEncoder.encode(response=response).cache_data()
-        await policy.storage.set(key=policy.get_key(request), value=response_data, expire=policy.ttl)
+async def get_ttl(policy: CachePolicy, key: str, body: bytes) -> Optional[int]:
+    """Return the TTL to store `body` with, updating the adaptive TTL state when it is enabled."""
+    adaptive = policy.adaptive_ttl
+    if adaptive is None:
+        return policy.ttl
+
+    state_key = f'{key}:ttl'
+    body_hash = await run_sized(policy.offload_threshold, len(body), content_hash, body)
+    ttl = adaptive.clamp(policy.ttl or adaptive.min_ttl)
+    if state := await storage_get(policy, state_key):
+        previous = json.loads(state)
+        ttl = adaptive.next_ttl(previous['ttl'], changed=previous['hash'] != body_hash)
+    await storage_set(
+        policy,
+        key=state_key,
+        value=json.dumps({'hash': body_hash, 'ttl': ttl}).encode(),
+        expire=adaptive.max_ttl * 2,
+    )
+    return ttl
+
+
+async def touch_unchanged(policy: CachePolicy, key: str, fingerprint: bytes, ttl: Optional[int]) -> bool:
+    """Extend the TTL of a stored entry with the same content instead of rewriting it.
+
+    Only the small fingerprint record kept next to the entry is read, never the entry itself.
+    Returns False when the entry has to be written: the content changed or the entry is gone.
+    """
+    hash_key = f'{key}:hash'
+    if await storage_get(policy, hash_key) != fingerprint or not await call_storage(
+        policy, lambda: policy.storage.touch(key, ttl), default=False
+    ):
+        return False
+    await call_storage(policy, lambda: policy.storage.touch(hash_key, ttl), default=False)
+    return True
+
+
+async def store_fingerprinted(
+    request: Request, policy: CachePolicy, key: str, entry: ResponseEncoder, ttl: Optional[int]
+) -> Optional[int]:
+    """Store an entry with its fingerprint record, unless an unchanged entry could be touched instead.
+
+    Returns the number of bytes written, or None when the entry was touched. The touch is only tried
+    when this request didn't already find the key absent, so plain misses cost a single write.
+    """
+    fingerprint = (await run_sized(policy.offload_threshold, len(entry.body), entry.fingerprint)).encode()
+    if request.scope.get(MISSED_KEY_SCOPE_KEY) != key and await touch_unchanged(policy, key, fingerprint, ttl):
+        return None
+    data = await run_sized(policy.offload_threshold, len(entry.body), entry.cache_data)
+    items = {key: data, f'{key}:hash': fingerprint}
+    await call_storage(policy, lambda: policy.storage.set_many(items, ttl), default=False)
+    return len(data)
+
 
+async def store_response(request: Request, response: Response, policy: CachePolicy, key: str) -> Optional[int]:
+    """Store a cachable response under `key` and return the TTL it was stored with."""
+    if is_negative_response(response, policy):
+        ttl = policy.negative_ttl
+    else:
+        ttl = await get_ttl(policy, key, response.body)
+    entry = ResponseEncoder.encode(response=response, ttl=ttl)
+    size: Optional[int]
+    if policy.touch_unchanged and not policy.http_cache and not policy.deduplicate_bodies:
+        size = await store_fingerprinted(request, policy, key, entry, ttl)
+    else:
+        size = await store_entry(policy, key, entry, ttl)
+    if size is not None and policy.analytics:
+        policy.analytics.record_store(key, size)
+    if policy.membership_filter:
+        policy.membership_filter.add(key)
+    if policy.refresh_ahead and not is_negative_response(response, policy):
+        policy.refresh_ahead.record_store(key, request, ttl)
+    return ttl
+
+
+async def cache_response(
+    request: Request, response: Response, cache_policy: Optional[CachePolicy], body: Any = None
+) -> Response:
+    if (
+        is_cachable(request, cache_policy)
+        and is_cachable_response(response, cast(CachePolicy, cache_policy))
+        and (key := await get_cache_key(request, cast(CachePolicy, cache_policy), body)) is not None
+    ):
+        policy = cast(CachePolicy, cache_policy)
+        ttl = await store_response(request, response, policy, key)
         if policy.cached_response_header:
             response.headers.update({policy.cached_response_header: 'false'})
+        if policy.http_cache:
+            response.headers.update(policy.http_cache.get_headers(ttl=ttl))
+
+    return response
+
+
+async def shadow_lookup(
+    request: Request, policy: CachePolicy, body: Any = None
+) -> Optional[Tuple[str, Optional[ResponseEncoder]]]:
+    """Look up the entry a shadowed policy would serve; None if the request isn't sampled."""
+    stats = cast(ShadowStats, policy.shadow)
+    if (key := await get_cache_key(request, policy, body)) is None or not stats.sampled(key):
+        return None
+    entry, _ = await load_entry(policy, key)
+    if entry is None:
+        request.scope[MISSED_KEY_SCOPE_KEY] = key
+    return key, entry
+
 
+async def shadow_response(
+    request: Request,
+    response: Response,
+    policy: CachePolicy,
+    key: str,
+    entry: Optional[ResponseEncoder],
+    latency: float,
+) -> Response:
+    """Compare the fresh response with the entry that would have been served.
+
+    Only misses are stored (without cache headers), so entries expire as they would if the policy served them.
+    """
+    stale = entry is not None and (entry.status_code != response.status_code or entry.body != response.body)
+    cast(ShadowStats, policy.shadow).record(hit=entry is not None, stale=stale, latency=latency)
+    if entry is None and is_cachable_response(response, policy):
+        await store_response(request, response, policy, key)
     return response
 
 
@@ -78,9 +442,78 @@ def get_request_handler(
     else:
         actual_response_class = response_class
 
+    limiter = (
+        ConcurrencyLimiter(cache_policy.max_concurrency, cache_policy.max_queued, cache_policy.queue_timeout)
+        if cache_policy and cache_policy.max_concurrency
+        else None
+    )
+
+    async def respond_batch(
+        request: Request,
+        policy: CachePolicy,
+        values: Dict[str, Any],
+        background_tasks: Any,
+        sub_response: Response,
+    ) -> Optional[Response]:
+        batch = cast(BatchPolicy, policy.batch)
+        requested = batch.split(values.get(batch.param))
+        if not requested:
+            return None
+        prefix = await apply_namespace(policy, f'{policy.get_key(request)}:{batch.param}', request)
+        if prefix is None:
+            return None
+        keys = [f'{prefix}:{item_id}' for item_id in requested]
+        misses: List[Optional[bytes]] = [None] * len(keys)
+        cached = await call_storage(policy, lambda: policy.storage.get_many(keys), default=misses)
+        items = {item_id: json.loads(data) for item_id, data in zip(requested, cached) if data}
+        if policy.analytics:
+            for key, value in zip(keys, cached):
+                policy.analytics.record_lookup(policy.label, key, len(value) if value else None)
+
+        if missing := [item_id for item_id in requested if item_id not in items]:
+            if limiter is not None:
+                try:
+                    await limiter.acquire()
+                except OriginOverloaded as e:
+                    raise HTTPException(status_code=503, detail=str(e)) from e
+                request.scope[LIMITER_SLOT_SCOPE_KEY] = True
+            values[batch.param] = batch.join(missing, requested, values[batch.param])
+            raw_response = await run_endpoint_function(dependant=dependant, values=values, is_coroutine=is_coroutine)
+            assert not isinstance(raw_response, Response), 'Batch endpoints must return a list of items'
+            content = await serialize_response(
+                field=response_field,
+                response_content=raw_response,
+                include=response_model_include,
+                exclude=response_model_exclude,
+                by_alias=response_model_by_alias,
+                exclude_unset=response_model_exclude_unset,
+                exclude_defaults=response_model_exclude_defaults,
+                exclude_none=response_model_exclude_none,
+                is_coroutine=is_coroutine,
+            )
+            fresh = {batch.get_item_id(item): item for item in content}
+            if fresh:
+                data = {f'{prefix}:{item_id}': json.dumps(item).encode() for item_id, item in fresh.items()}
+                await call_storage(policy, lambda: policy.storage.set_many(data, policy.ttl), default=False)
+                if policy.analytics:
+                    for key, value in data.items():
+                        policy.analytics.record_store(key, len(value))
+            items.update(fresh)
+
+        response_args: Dict[str, Any] = {'background': background_tasks}
+        if current_status_code := sub_response.status_code or status_code:
+            response_args['status_code'] = current_status_code
+        response = actual_response_class([items[item_id] for item_id in requested if item_id in items], **response_args)
+        response.headers.raw.extend(sub_response.headers.raw)
+        if policy.cached_response_header:
+            response.headers[policy.cached_response_header] = 'false' if missing else 'true'
+        return response
+
     async def app(request: Request) -> Response:
         exception_to_reraise: Optional[Exception] = None
         response: Union[Response, None] = None
+        shadow: Optional[Tuple[str, Optional[ResponseEncoder]]] = None
+        started = 0.0
         async with AsyncExitStack() as async_exit_stack:
             # TODO: remove this scope later, after a few releases
             # This scope fastapi_astack is no longer used by FastAPI, kept for
@@ -153,13 +586,47 @@ def get_request_handler(
                 exception_to_reraise = validation_error
                 raise validation_error
             else:
-                if response := await get_cached_response(request, cache_policy):
+                # A shadowed policy looks up and stores entries, but always serves the fresh response
+                shadowed = bool(cache_policy and cache_policy.shadow)
+                if shadowed and is_cachable(request, cache_policy):
+                    shadow = await shadow_lookup(request, cast(CachePolicy, cache_policy), body)
+                if not shadowed and cache_policy and cache_policy.batch and is_cachable(request, cache_policy):
+                    try:
+                        response = await respond_batch(request, cache_policy, values, background_tasks, sub_response)
+                    except Exception as e:
+                        exception_to_reraise = e
+                        raise e
+                    if response is not None:
+                        return response
+                if not shadowed and (response := await get_cached_response(request, cache_policy, body)):
                     return response
+                if limiter is not None:
+                    try:
+                        waited = await limiter.acquire()
+                    except OriginOverloaded as e:
+                        exception_to_reraise = HTTPException(status_code=503, detail=str(e))
+                        raise exception_to_reraise from e
+                    request.scope[LIMITER_SLOT_SCOPE_KEY] = True
+                    # Another request may have filled the entry while this one was queued
+                    if waited and not shadowed and (response := await get_cached_response(request, cache_policy, body)):
+                        return response
 
+                started = monotonic()
                 try:
                     raw_response = await run_endpoint_function(
                         dependant=dependant, values=values, is_coroutine=is_coroutine
                     )
+                except HTTPException as e:
+                    # Expected misses are cached as the response the app's exception handler renders,
+                    # so repeated lookups of missing resources don't reach the endpoint
+                    if not (
+                        is_cachable(request, cache_policy)
+                        and e.status_code in cast(CachePolicy, cache_policy).negative_status_codes
+                        and cast(CachePolicy, cache_policy).negative_ttl is not None
+                    ):
+                        exception_to_reraise = e
+                        raise e
+                    raw_response = await render_http_exception(request, e)
                 except Exception as e:
                     exception_to_reraise = e
                     raise e
@@ -199,7 +666,23 @@ def get_request_handler(
         if exception_to_reraise:
             raise exception_to_reraise
         assert response is not None, 'An error occurred while generating the request'
-        return await cache_response(request, response, cache_policy)
+        if cache_policy and cache_policy.shadow:
+            if shadow is None:
+                return response
+            key, entry = shadow
+            return await shadow_response(request, response, cache_policy, key, entry, monotonic() - started)
+        return await cache_response(request, response, cache_policy, body)
+
+    if limiter is None:
+        return app
+
+    async def limited_app(request: Request) -> Response:
+        # The slot is released only after the response is stored, so queued misses of the same key find it
+        try:
+            return await app(request)
+        finally:
+            if request.scope.pop(LIMITER_SLOT_SCOPE_KEY, False):
+                limiter.release()
 
-    return app
+    return limited_app
 
@@ -0,0 +1,152 @@
+import asyncio
+import inspect
+from dataclasses import dataclass, field
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union,
+)
+from urllib.parse import urlsplit
+
+from starlette.types import ASGIApp, Message
+
+URLs = Union[Iterable[str], AsyncIterable[str]]
+ProgressCallback = Callable[[str, Optional[int], Optional[BaseException]], Any]
+
+
+@dataclass
+class WarmingReport:
+    total: int = 0
+    succeeded: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+
+async def call_asgi(
+    app: ASGIApp,
+    url: str,
+    method: str = 'GET',
+    headers: Optional[Mapping[str, str]] = None,
+    extensions: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Run a single bodiless request through the ASGI app and return the response status code."""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    raw_headers = [
+        (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()
+    ]
+    if not any(name == b'host' for name, _ in raw_headers):
+        raw_headers.append((b'host', (parts.netloc or 'localhost').encode('latin-1')))
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': parts.scheme or 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': raw_headers,
+        'client': None,
+        'server': None,
+        **(extensions or {}),
+    }
+    status_code = 0
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive() -> Message:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await response_complete.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: Message) -> None:
+        nonlocal status_code
+        if message['type'] == 'http.response.start':
+            status_code = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body', False):
+            response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        response_complete.set()
+    return status_code
+
+
+async def _iterate(urls: URLs) -> AsyncIterator[str]:
+    if isinstance(urls, AsyncIterable):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+
+async def warm_cache(
+    app: ASGIApp,
+    urls: URLs,
+    *,
+    concurrency: int = 10,
+    headers: Optional[Mapping[str, str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> WarmingReport:
+    """Request every URL through the app so cache misses are filled by the regular `cache_response` path.
+
+    URLs are pulled lazily, so `urls` may be a (possibly async) generator of any length.
+    At most `concurrency` requests are in flight at the same time.
+    """
+    assert concurrency > 0, 'concurrency must be positive'
+    report = WarmingReport()
+    iterator = _iterate(urls)
+    lock = asyncio.Lock()
+
+    async def next_url() -> Optional[str]:
+        async with lock:
+            try:
+                return await iterator.__anext__()
+            except StopAsyncIteration:
+                return None
+
+    async def worker() -> None:
+        while (url := await next_url()) is not None:
+            report.total += 1
+            status_code: Optional[int] = None
+            error: Optional[BaseException] = None
+            try:
+                status_code = await call_asgi(app, url, headers=headers)
+            except Exception as e:
+                error = e
+                report.failed.append((url, repr(e)))
+            else:
+                if 200 <= status_code < 400:
+                    report.succeeded += 1
+                else:
+                    report.failed.append((url, f'status {status_code}'))
+            if on_progress:
+                result = on_progress(url, status_code, error)
+                if inspect.isawaitable(result):
+                    await result
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return report
+
+
+async def warm_cache_periodically(
+    app: ASGIApp,
+    urls: Callable[[], URLs],
+    interval: float,
+    *,
+    on_report: Optional[Callable[[WarmingReport], Any]] = None,
+    **kwargs: Any,
+) -> None:
+    """Re-run `warm_cache` every `interval` seconds with a fresh URL source, until cancelled."""
+    while True:
+        report = await warm_cache(app, urls(), **kwargs)
+        if on_report:
+            on_report(report)
+        await asyncio.sleep(interval)
+
+
+__all__ = ('WarmingReport', 'warm_cache', 'warm_cache_periodically')
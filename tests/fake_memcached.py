@@ -0,0 +1,100 @@
+import asyncio
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from cachepot.storages.memcached import (
+    ADD, DELETE, DELETEQ, GET, GETKQ, HEADER, NOOP, RESPONSE_MAGIC, SET, SETQ, STATUS_KEY_NOT_FOUND, STATUS_OK, TOUCH,
+)
+
+QUIET = {GETKQ, SETQ, DELETEQ}
+STATUS_KEY_EXISTS = 0x02
+
+
+class FakeMemcached:
+    """In-process server speaking the subset of the memcached binary protocol `MemcachedStorage` uses."""
+
+    def __init__(self) -> None:
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.opcodes: List[int] = []
+        self.connections = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def address(self) -> str:
+        assert self.server is not None
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f'{host}:{port}'
+
+    async def start(self) -> 'FakeMemcached':
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None or (item[1] is not None and item[1] <= time.time()):
+            self.data.pop(key, None)
+            return None
+        return item[0]
+
+    @staticmethod
+    def _expires_at(expire: int) -> Optional[float]:
+        return None if expire == 0 else (expire if expire > 30 * 24 * 60 * 60 else time.time() + expire)
+
+    def _execute(self, opcode: int, key: bytes, extras: bytes, value: bytes) -> Tuple[int, bytes, bytes, bytes]:
+        """Return the status, extras, key and value of the response."""
+        if opcode in (GET, GETKQ):
+            found = self._get(key)
+            if found is None:
+                return STATUS_KEY_NOT_FOUND, b'', b'', b''
+            return STATUS_OK, struct.pack('>I', 0), key if opcode == GETKQ else b'', found
+        if opcode in (SET, SETQ):
+            _, expire = struct.unpack('>II', extras)
+            self.data[key] = (value, self._expires_at(expire))
+            return STATUS_OK, b'', b'', b''
+        if opcode == ADD:
+            if self._get(key) is not None:
+                return STATUS_KEY_EXISTS, b'', b'', b''
+            _, expire = struct.unpack('>II', extras)
+            self.data[key] = (value, self._expires_at(expire))
+            return STATUS_OK, b'', b'', b''
+        if opcode in (DELETE, DELETEQ):
+            found = self._get(key)
+            self.data.pop(key, None)
+            return (STATUS_OK if found is not None else STATUS_KEY_NOT_FOUND), b'', b'', b''
+        if opcode == TOUCH:
+            if self._get(key) is None:
+                return STATUS_KEY_NOT_FOUND, b'', b'', b''
+            (expire,) = struct.unpack('>I', extras)
+            self.data[key] = (self.data[key][0], self._expires_at(expire))
+            return STATUS_OK, b'', b'', b''
+        assert opcode == NOOP, f'Unsupported opcode {opcode:#x}'
+        return STATUS_OK, b'', b'', b''
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                _, opcode, key_length, extras_length, _, _, body_length, opaque, _ = HEADER.unpack(header)
+                body = await reader.readexactly(body_length)
+                extras, key = body[:extras_length], body[extras_length:extras_length + key_length]
+                self.opcodes.append(opcode)
+                status, extras, key, value = self._execute(opcode, key, extras, body[extras_length + key_length:])
+                if opcode in QUIET and (status == STATUS_OK if opcode != GETKQ else status != STATUS_OK):
+                    continue
+                response = HEADER.pack(
+                    RESPONSE_MAGIC, opcode, len(key), len(extras), 0, status,
+                    len(extras) + len(key) + len(value), opaque, 0,
+                )
+                writer.write(response + extras + key + value)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
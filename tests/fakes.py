@@ -0,0 +1,27 @@
+from typing import Dict, Optional, Tuple
+
+from cachepot.storages.abstract import AbstractStorage
+
+
+class FakeStorage(AbstractStorage):
+    """Dict-backed storage that remembers the expiry it was given instead of enforcing it."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Tuple[bytes, Optional[int]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self.data.get(key)
+        return item[0] if item else None
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> bool:
+        self.data[key] = (value, expire)
+        return True
+
+    async def delete(self, key: str) -> bool:
+        return self.data.pop(key, None) is not None
+
+    async def touch(self, key: str, expire: Optional[int] = None) -> bool:
+        if key not in self.data:
+            return False
+        self.data[key] = (self.data[key][0], expire)
+        return True
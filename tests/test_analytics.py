@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from cachepot.analytics import CacheAnalytics, SpaceSaving, get_analytics_router
+from cachepot.app import CachedFastAPI
+from cachepot.constants import CachePolicy
+from tests.fakes import FakeStorage
+
+
+def test_space_saving_keeps_heavy_hitters():
+    top = SpaceSaving(capacity=10)
+    for i in range(100):
+        top.add('hot')
+        top.add(f'cold{i}')
+        if i % 2:
+            top.add('warm')
+
+    assert [key for key, _ in top.top(2)] == ['hot', 'warm']
+    assert top.top(1)[0][1] >= 100
+
+
+def test_cache_analytics_report():
+    analytics = CacheAnalytics(sample_rate=1)
+    app = CachedFastAPI()
+    app.include_router(get_analytics_router(analytics))
+
+    @app.get('/items/{item_id}', cache_policy=CachePolicy(
+        storage=FakeStorage(), key=lambda request: request.url.path, analytics=analytics,
+    ))
+    def get_item(item_id: int):
+        return {'id': item_id, 'payload': 'x' * item_id}
+
+    @app.get('/static', cache_policy=CachePolicy(storage=FakeStorage(), key='static', analytics=analytics))
+    def static():
+        return {}
+
+    @app.get('/users/{user_id}', cache_policy=CachePolicy(
+        storage=FakeStorage(), key=lambda request: request.url.path, analytics=analytics, name='users',
+    ))
+    def get_user(user_id: int):
+        return {'id': user_id}
+
+    client = TestClient(app)
+    for _ in range(3):
+        client.get('/items/1')
+        client.get('/static')
+    client.get('/items/100')
+    client.get('/users/1')
+
+    report = client.get('/cache/analytics', params={'n': 2}).json()
+    assert report['hot_keys'] == [{'key': '/items/1', 'count': 3}, {'key': 'static', 'count': 3}]
+    assert report['big_keys'][0]['key'] == '/items/100'
+    # lambda-keyed policies are told apart by an explicit name
+    assert report['worst_policies'][0] == {'policy': 'users', 'hits': 0, 'misses': 1, 'hit_ratio': 0.0}
+    assert report['worst_policies'][1]['policy'] == 'test_cache_analytics_report.<locals>.<lambda>'
+    assert report['worst_policies'][1]['hit_ratio'] == 0.5
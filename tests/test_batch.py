@@ -0,0 +1,69 @@
+from typing import List
+
+from fastapi import Query
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import BatchPolicy, CachePolicy
+from tests.fakes import FakeStorage
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+def make_app():
+    app = CachedFastAPI()
+    storage = FakeStorage()
+    calls = []
+
+    @app.get(
+        '/items',
+        response_model=List[Item],
+        cache_policy=CachePolicy(storage=storage, key='items', batch=BatchPolicy(param='ids')),
+    )
+    def get_items(ids: str):
+        calls.append(ids)
+        return [{'id': int(item_id), 'name': f'item {item_id}'} for item_id in ids.split(',') if item_id != '404']
+
+    @app.get(
+        '/users',
+        cache_policy=CachePolicy(storage=storage, key='users', batch=BatchPolicy(param='id', item_id='user_id')),
+    )
+    def get_users(id: List[int] = Query()):
+        calls.append(id)
+        return [{'user_id': user_id} for user_id in id]
+
+    return TestClient(app), storage, calls
+
+
+def test_batch_items_are_cached_individually():
+    client, storage, calls = make_app()
+
+    response = client.get('/items', params={'ids': '1,2'})
+    assert response.json() == [{'id': 1, 'name': 'item 1'}, {'id': 2, 'name': 'item 2'}]
+    assert response.headers['x-cache-hit'] == 'false'
+
+    response = client.get('/items', params={'ids': '3,2,1,404'})
+    assert [item['id'] for item in response.json()] == [3, 2, 1]
+    assert response.headers['x-cache-hit'] == 'false'
+
+    response = client.get('/items', params={'ids': '2,3'})
+    assert [item['id'] for item in response.json()] == [2, 3]
+    assert response.headers['x-cache-hit'] == 'true'
+
+    assert calls == ['1,2', '3,404']
+    assert set(storage.data) == {'items:ids:1', 'items:ids:2', 'items:ids:3'}
+
+
+def test_batch_list_parameter():
+    client, storage, calls = make_app()
+
+    client.get('/users', params={'id': [1, 2]})
+    response = client.get('/users', params={'id': [2, 3]})
+
+    assert response.json() == [{'user_id': 2}, {'user_id': 3}]
+    assert calls == [[1, 2], [3]]
+    assert 'users:id:3' in storage.data
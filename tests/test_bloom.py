@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.requests import Request
+from fastapi.responses import Response
+
+from cachepot.bloom import BloomFilter, RotatingBloomFilter
+from cachepot.constants import CachePolicy
+from cachepot.storages.memory import MemoryStorage
+from cachepot.utils import cache_response, get_cached_response
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'key{i}')
+
+    assert all(f'key{i}' in bloom for i in range(1000))
+    assert sum(f'other{i}' in bloom for i in range(1000)) < 30
+
+
+def test_rotating_bloom_filter(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('cachepot.bloom.time.time', lambda: now[0])
+    monkeypatch.setattr('cachepot.bloom.monotonic', lambda: now[0])
+    bloom = RotatingBloomFilter(capacity=100, rotation_interval=100)
+    bloom.add('old')
+    assert bloom.might_contain('unknown')  # not trusted before a full interval has passed
+
+    now[0] = 1100
+    bloom.add('new')
+    assert bloom.might_contain('old') and bloom.might_contain('new')
+    assert not bloom.might_contain('unknown')
+
+    now[0] = 1200
+    assert not bloom.might_contain('old')
+    assert bloom.might_contain('new')
+
+
+@pytest.mark.asyncio
+async def test_rotating_bloom_filter_sync():
+    storage = MemoryStorage()
+    first, second = RotatingBloomFilter(capacity=100), RotatingBloomFilter(capacity=100)
+    first.add('first')
+    second.add('second')
+
+    await first.sync(storage)
+    await second.sync(storage)
+    await first.sync(storage)
+
+    assert first.might_contain('second') and second.might_contain('first')
+    assert not first.might_contain('unknown')
+
+
+@pytest.mark.asyncio
+async def test_get_cached_response_skips_known_absent_keys():
+    storage = MemoryStorage()
+    bloom = RotatingBloomFilter(capacity=100)
+    await bloom.sync(storage)
+    policy = CachePolicy(storage=storage, key=lambda request: request.url.path, membership_filter=bloom)
+    requests = {
+        path: Request(scope={'type': 'http', 'method': 'GET', 'path': path, 'headers': [(b'host', b'test')]})
+        for path in ('/cached', '/cold')
+    }
+    await cache_response(request=requests['/cached'], response=Response(content=b'{"a": 1}'), cache_policy=policy)
+
+    with patch.object(storage, 'get', wraps=storage.get) as mock_get:
+        assert await get_cached_response(request=requests['/cold'], cache_policy=policy) is None
+        assert await get_cached_response(request=requests['/cached'], cache_policy=policy)
+    mock_get.assert_called_once_with('/cached')
@@ -0,0 +1,33 @@
+from cachepot.breaker import BreakerState, CircuitBreaker
+
+
+def test_circuit_breaker_opens_on_failures(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr('cachepot.breaker.monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, cooldown=10)
+
+    for success in (True, False, True):
+        breaker.record(success)
+    assert breaker.state == BreakerState.CLOSED
+    breaker.record(False)
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()  # half-open probe
+    assert not breaker.allow()  # only a single probe at a time
+    breaker.record(False)
+    assert breaker.state == BreakerState.OPEN
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.allow()
+
+
+def test_circuit_breaker_counts_slow_calls_as_failures():
+    breaker = CircuitBreaker(latency_threshold=0.1, window=2, min_calls=2)
+    breaker.record(True, latency=0.05)
+    breaker.record(True, latency=0.5)
+    assert breaker.state == BreakerState.OPEN
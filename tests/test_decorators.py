@@ -0,0 +1,139 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from pydantic import BaseModel
+
+from cachepot.constants import CachePolicy
+from cachepot.decorators import cached
+from cachepot.serializers import PickleSerializer
+from tests.fakes import FakeStorage
+
+
+class User(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.mark.asyncio
+async def test_cached():
+    storage = FakeStorage()
+    calls = []
+
+    @cached(CachePolicy(storage=storage, key='users', ttl=60))
+    async def get_user(user_id: int, verbose: bool = False) -> User:
+        calls.append(user_id)
+        return User(id=user_id, name=f'user{user_id}')
+
+    assert await get_user(1) == User(id=1, name='user1')
+    assert await get_user(user_id=1, verbose=False) == User(id=1, name='user1')
+    assert isinstance(await get_user(1), User)
+    assert await get_user(2) == User(id=2, name='user2')
+
+    assert calls == [1, 2]
+    assert [expire for _, expire in storage.data.values()] == [60, 60]
+
+
+@pytest.mark.asyncio
+async def test_cached_coalesces_concurrent_calls():
+    calls = []
+
+    class Client:
+        @cached(CachePolicy(storage=FakeStorage(), key='client'), serializer=PickleSerializer())
+        async def fetch(self, path: str) -> dict:
+            calls.append(path)
+            await asyncio.sleep(0.01)
+            return {'path': path}
+
+    results = await asyncio.gather(*(Client().fetch('/a') for _ in range(5)))
+
+    assert results == [{'path': '/a'}] * 5
+    assert calls == ['/a']
+
+
+@pytest.mark.asyncio
+async def test_cached_methods_are_keyed_on_the_instance():
+    calls = []
+
+    class Client:
+        def __init__(self, base_url: str):
+            self.base_url = base_url
+
+        @cached(CachePolicy(storage=FakeStorage(), key='client'), serializer=PickleSerializer())
+        async def fetch(self, path: str) -> str:
+            calls.append(self.base_url)
+            return self.base_url + path
+
+        @cached(CachePolicy(storage=FakeStorage(), key='shared'), serializer=PickleSerializer(), ignore_self=True)
+        async def version(self) -> str:
+            calls.append(self.base_url)
+            return self.base_url
+
+    first, second = Client('https://a'), Client('https://b')
+    assert [await first.fetch('/x'), await second.fetch('/x'), await Client('https://a').fetch('/x')] == [
+        'https://a/x', 'https://b/x', 'https://a/x'
+    ]
+    assert [await first.version(), await second.version()] == ['https://a', 'https://a']
+    assert calls == ['https://a', 'https://b', 'https://a']
+
+
+@pytest.mark.asyncio
+async def test_callers_arriving_before_the_store_reuse_the_result():
+    storage = FakeStorage()
+    calls = []
+    stored = asyncio.Event()
+
+    async def slow_set(key, value, expire=None):
+        await stored.wait()
+        storage.data[key] = (value, expire)
+        return True
+
+    @cached(CachePolicy(storage=storage, key='slow_store'))
+    async def compute(value: int) -> int:
+        calls.append(value)
+        return value
+
+    with patch.object(storage, 'set', side_effect=slow_set):
+        first = asyncio.ensure_future(compute(1))
+        await asyncio.sleep(0.01)
+        assert await compute(1) == 1  # the result is computed but not stored yet
+        stored.set()
+        assert await first == 1
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_cached_propagates_errors_to_waiters():
+    @cached(CachePolicy(storage=FakeStorage(), key='failing'))
+    async def fail() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    results = await asyncio.gather(fail(), fail(), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_hands_over_to_waiters():
+    calls = []
+
+    @cached(CachePolicy(storage=FakeStorage(), key='slow'))
+    async def slow(value: int) -> int:
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    leader = asyncio.ensure_future(slow(1))
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.ensure_future(slow(1)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await asyncio.gather(*waiters) == [1, 1, 1]
+    assert leader.cancelled()
+    assert calls == [1, 1]
+
+
+def test_cached_requires_static_key():
+    with pytest.raises(AssertionError):
+        cached(CachePolicy(storage=FakeStorage(), key=lambda request: 'key'))
@@ -0,0 +1,89 @@
+from fastapi import Depends, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import CachePolicy
+from cachepot.dependencies import cached_dependency
+from tests.fakes import FakeStorage
+
+
+class Permissions(BaseModel):
+    user: str
+    scopes: list
+
+
+def test_cached_dependency():
+    app = CachedFastAPI()
+    storage = FakeStorage()
+    calls = []
+
+    def get_user(user: str) -> str:
+        return user.lower()
+
+    async def load_permissions(user: str = Depends(get_user)) -> Permissions:
+        calls.append(user)
+        return Permissions(user=user, scopes=['read'])
+
+    permissions_dependency = cached_dependency(load_permissions, CachePolicy(storage=storage, key='permissions'))
+
+    @app.get('/')
+    def endpoint(permissions: Permissions = Depends(permissions_dependency)):
+        assert isinstance(permissions, Permissions)
+        return permissions
+
+    client = TestClient(app)
+    for user in ('Alice', 'alice', 'Bob'):
+        response = client.get('/', params={'user': user})
+        assert response.json() == {'user': user.lower(), 'scopes': ['read']}
+
+    assert calls == ['alice', 'bob']
+    assert len(storage.data) == 2
+    assert all(key.startswith('permissions:tests.test_dependencies.') for key in storage.data)
+
+
+def test_cached_dependency_respects_no_cache():
+    app = CachedFastAPI()
+    calls = []
+
+    def load_config() -> dict:
+        calls.append(1)
+        return {'feature': True}
+
+    @app.get('/')
+    def endpoint(config=Depends(cached_dependency(load_config, CachePolicy(storage=FakeStorage(), key='config')))):
+        return config
+
+    client = TestClient(app)
+    client.get('/')
+    client.get('/')
+    client.get('/', headers={'cache-control': 'no-cache'})
+    assert len(calls) == 2
+
+
+def test_dependency_reading_the_request_is_keyed_per_caller():
+    storage = FakeStorage()
+    calls = []
+
+    def current_user(request: Request) -> str:
+        calls.append(request.headers['authorization'])
+        return request.headers['authorization']
+
+    def make_client(policy: CachePolicy) -> TestClient:
+        app = CachedFastAPI()
+
+        @app.get('/')
+        def endpoint(user: str = Depends(cached_dependency(current_user, policy))):
+            return user
+
+        return TestClient(app)
+
+    shared = make_client(CachePolicy(storage=storage, key='user'))
+    assert [shared.get('/', headers={'authorization': user}).json() for user in ('alice', 'bob')] == ['alice', 'bob']
+    assert storage.data == {}  # a request-independent key can't tell callers apart, so nothing is cached
+
+    per_user = make_client(CachePolicy(storage=storage, key=lambda request: request.headers['authorization']))
+    calls.clear()
+    for user in ('alice', 'bob', 'alice', 'bob'):
+        assert per_user.get('/', headers={'authorization': user}).json() == user
+    assert calls == ['alice', 'bob']
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import BatchPolicy, CachePolicy
+from cachepot.limiter import ConcurrencyLimiter, OriginOverloaded
+from cachepot.warming import call_asgi
+from tests.fakes import FakeStorage
+
+
+@pytest.mark.asyncio
+async def test_limiter_queue_and_timeout():
+    limiter = ConcurrencyLimiter(1, max_queued=1, timeout=0.05)
+    assert await limiter.acquire() is False
+
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(OriginOverloaded):
+        await limiter.acquire()
+
+    limiter.release()
+    assert await waiter is True
+    with pytest.raises(OriginOverloaded):
+        await limiter.acquire()
+
+
+def make_app(**policy_kwargs) -> CachedFastAPI:
+    app = CachedFastAPI()
+    app.state.calls = []
+    policy = CachePolicy(storage=FakeStorage(), key=lambda request: request.url.path, **policy_kwargs)
+
+    @app.get('/items/{item_id}', cache_policy=policy)
+    async def get_item(item_id: int):
+        app.state.calls.append(item_id)
+        await asyncio.sleep(0.05)
+        return {'id': item_id}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_queued_misses_recheck_cache():
+    app = make_app(max_concurrency=1)
+
+    statuses = await asyncio.gather(*(call_asgi(app, '/items/1') for _ in range(5)))
+
+    assert statuses == [200] * 5
+    assert app.state.calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_overflow_fails_fast():
+    app = make_app(max_concurrency=1, max_queued=1)
+
+    statuses = await asyncio.gather(*(call_asgi(app, f'/items/{i}') for i in range(3)))
+
+    assert sorted(statuses) == [200, 200, 503]
+    assert len(app.state.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_misses_take_a_slot():
+    app = CachedFastAPI()
+    calls = []
+    policy = CachePolicy(
+        storage=FakeStorage(), key='items', batch=BatchPolicy(param='ids'), max_concurrency=1, max_queued=0
+    )
+
+    @app.get('/items', cache_policy=policy)
+    async def get_items(ids: str):
+        calls.append(ids)
+        await asyncio.sleep(0.05)
+        return [{'id': int(item_id)} for item_id in ids.split(',')]
+
+    statuses = await asyncio.gather(call_asgi(app, '/items?ids=1,2'), call_asgi(app, '/items?ids=3'))
+
+    assert sorted(statuses) == [200, 503]
+    assert len(calls) == 1
+    assert await call_asgi(app, '/items?ids=3') == 200  # the slot was released
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from cachepot.storages.memcached import GETKQ, NOOP, SETQ, MemcachedStorage
+from tests.fake_memcached import FakeMemcached
+
+
+@pytest_asyncio.fixture
+async def servers():
+    servers = [await FakeMemcached().start() for _ in range(2)]
+    yield servers
+    for server in servers:
+        await server.stop()
+
+
+@pytest_asyncio.fixture
+async def storage(servers):
+    storage = MemcachedStorage([server.address for server in servers], pool_size=2)
+    yield storage
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_get_set_delete_touch(storage, servers):
+    assert await storage.get('key') is None
+    assert await storage.set('key', b'value', expire=60)
+    assert await storage.get('key') == b'value'
+    assert await storage.touch('key', expire=120)
+    assert not await storage.touch('missing')
+    assert not await storage.set_if_absent('key', b'other')
+    assert await storage.delete('key')
+    assert not await storage.delete('key')
+    assert await storage.set_if_absent('key', b'other')
+    assert await storage.get('key') == b'other'
+
+    long_key = 'k' * 300
+    assert await storage.set(long_key, b'long')
+    assert await storage.get(long_key) == b'long'
+
+
+@pytest.mark.asyncio
+async def test_set_at_least_never_shortens_the_lifetime(storage, servers):
+    def expires_at():
+        return next(server.data[b'body'][1] for server in servers if b'body' in server.data)
+
+    assert await storage.set_at_least('body', b'value', expire=100)
+    longest = expires_at()
+    assert await storage.set_at_least('body', b'value', expire=10)
+    assert expires_at() == longest
+    assert await storage.set_at_least('body', b'value', expire=1000)
+    assert expires_at() > longest
+    assert await storage.set_at_least('body', b'value')
+    assert expires_at() is None
+    assert await storage.set_at_least('body', b'value', expire=10)
+    assert expires_at() is None
+    assert await storage.get('body') == b'value'
+
+
+@pytest.mark.asyncio
+async def test_keys_are_distributed(storage, servers):
+    await storage.set_many({f'key{i}': str(i).encode() for i in range(50)})
+    assert all(len(server.data) > 10 for server in servers)
+    assert sum(len(server.data) for server in servers) == 50
+
+
+@pytest.mark.asyncio
+async def test_batched_operations_take_one_round_trip_per_server(storage, servers):
+    items = {f'key{i}': f'value{i}'.encode() for i in range(20)}
+    assert await storage.set_many(items, expire=60)
+    for server in servers:
+        assert set(server.opcodes) == {SETQ, NOOP} and server.opcodes.count(NOOP) == 1
+        server.opcodes.clear()
+
+    keys = ['missing', *items, 'key0']
+    assert await storage.get_many(keys) == [None, *items.values(), b'value0']
+    for server in servers:
+        assert set(server.opcodes) == {GETKQ, NOOP} and server.opcodes.count(NOOP) == 1
+
+    assert await storage.delete_many(['key1', 'key2', 'missing']) == 2
+    assert await storage.get_many(['key1', 'key3']) == [None, b'value3']
+
+
+@pytest.mark.asyncio
+async def test_connection_pool_reuses_connections(storage, servers):
+    await asyncio.gather(*(storage.set(f'key{i}', b'value') for i in range(20)))
+    await asyncio.gather(*(storage.get(f'key{i}') for i in range(20)))
+    assert all(server.connections <= 2 for server in servers)
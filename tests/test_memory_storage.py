@@ -0,0 +1,92 @@
+import pytest
+
+from cachepot.storages.memory import MemoryStorage, FrequencySketch
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('cachepot.storages.memory.monotonic', clock)
+    return clock
+
+
+async def compute(storage: MemoryStorage, clock: Clock, key: str, value: bytes, cost: float) -> None:
+    """Simulate a cache miss followed by a recompute which takes `cost` seconds."""
+    assert await storage.get(key) is None
+    clock.now += cost
+    await storage.set(key, value)
+
+
+@pytest.mark.asyncio
+async def test_get_set_delete_expire(clock):
+    storage = MemoryStorage()
+    assert await storage.set('key', b'value', expire=10)
+    assert await storage.get('key') == b'value'
+
+    clock.now += 10
+    assert await storage.get('key') is None
+    assert len(storage) == 0
+
+    await storage.set('key', b'value')
+    assert not await storage.set_if_absent('key', b'other')
+    assert await storage.delete('key')
+    assert not await storage.delete('key')
+    assert await storage.get('key') is None
+    assert await storage.set_if_absent('key', b'other')
+
+
+@pytest.mark.asyncio
+async def test_eviction_prefers_cheap_entries(clock):
+    storage = MemoryStorage(max_size=30, admission=False)
+    await compute(storage, clock, 'expensive', b'x' * 5, cost=5)
+    await compute(storage, clock, 'cheap', b'x' * 5, cost=0.01)
+    await compute(storage, clock, 'new', b'x' * 10, cost=1)
+
+    assert await storage.get('expensive') is not None
+    assert await storage.get('cheap') is None
+    assert await storage.get('new') is not None
+    assert storage.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_one_hit_wonders(clock):
+    storage = MemoryStorage(max_size=16)
+    for _ in range(3):
+        await storage.get('hot')
+    await storage.set('hot', b'x' * 13)
+
+    for i in range(10):
+        await compute(storage, clock, f's{i}', b'x' * 13, cost=1)
+
+    assert await storage.get('hot') is not None
+    assert storage.rejections == 10
+
+
+def test_frequency_sketch_ageing():
+    sketch = FrequencySketch(width=64, sample_size=40)
+    for _ in range(20):
+        sketch.increment('key')
+    assert sketch.estimate('key') == FrequencySketch.max_count
+    for i in range(20):
+        sketch.increment(f'other{i}')
+    assert sketch.estimate('key') <= FrequencySketch.max_count // 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_touch(clock):
+    storage = MemoryStorage()
+    assert not await storage.touch('key', 10)
+    await storage.set('key', b'value', expire=10)
+
+    clock.now += 5
+    assert await storage.touch('key', 10)
+    clock.now += 9
+    assert await storage.get('key') == b'value'
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+from starlette.datastructures import MutableHeaders
+
+from cachepot.constants import CachePolicy
+from cachepot.encoders import ResponseEncoder
+from cachepot.offload import run_sized
+from cachepot.utils import load_entry, store_entry
+from tests.fakes import FakeStorage
+
+
+def current_thread_name() -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_run_sized_offloads_large_inputs_only():
+    assert await run_sized(None, 10 ** 9, current_thread_name) == threading.current_thread().name
+    assert await run_sized(1024, 100, current_thread_name) == threading.current_thread().name
+    assert (await run_sized(1024, 1024, current_thread_name)).startswith('cachepot')
+
+
+@pytest.mark.asyncio
+async def test_large_entries_roundtrip_through_pool():
+    policy = CachePolicy(storage=FakeStorage(), key='test', offload_threshold=16)
+    entry = ResponseEncoder(status_code=200, headers=MutableHeaders(), body=b'x' * 1024)
+
+    size = await store_entry(policy, 'key', entry, ttl=30)
+    loaded, loaded_size = await load_entry(policy, 'key')
+
+    assert loaded is not None and loaded.body == entry.body
+    assert loaded_size == size
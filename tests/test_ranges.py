@@ -0,0 +1,63 @@
+import pytest
+from fastapi.requests import Request
+from starlette.datastructures import MutableHeaders
+
+from cachepot.encoders import ResponseEncoder
+from cachepot.ranges import RangeNotSatisfiable, apply_range, parse_range
+
+
+@pytest.mark.parametrize(
+    'header, expected',
+    (
+        ('bytes=0-4', (0, 4)),
+        ('bytes=5-', (5, 9)),
+        ('bytes=-3', (7, 9)),
+        ('bytes=2-100', (2, 9)),
+        ('bytes=-100', (0, 9)),
+        ('bytes=0-1,4-5', None),
+        ('items=0-1', None),
+        ('bytes=5-2', None),
+        ('bytes=a-b', None),
+    )
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+@pytest.mark.parametrize('header, size', [('bytes=10-', 10), ('bytes=-0', 10), ('bytes=-5', 0), ('bytes=0-', 0)])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+def make_request(**headers):
+    return Request(scope={
+        'type': 'http',
+        'method': 'GET',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def make_entry():
+    return ResponseEncoder(
+        body=b'0123456789', status_code=200, headers=MutableHeaders({'etag': '"v1"', 'content-length': '10'}),
+    )
+
+
+def test_apply_range():
+    entry = apply_range(make_request(range='bytes=2-5'), make_entry())
+    assert entry.status_code == 206
+    assert entry.body == b'2345'
+    assert entry.headers['content-range'] == 'bytes 2-5/10'
+    assert entry.headers['content-length'] == '4'
+
+    entry = apply_range(make_request(range='bytes=20-'), make_entry())
+    assert entry.status_code == 416
+    assert entry.headers['content-range'] == 'bytes */10'
+
+
+@pytest.mark.parametrize('if_range, status_code', (('"v1"', 206), ('"v2"', 200), ('W/"v1"', 200)))
+def test_apply_range_if_range(if_range, status_code):
+    entry = apply_range(make_request(range='bytes=2-5', if_range=if_range), make_entry())
+    assert entry.status_code == status_code
+    assert entry.headers['accept-ranges'] == 'bytes'
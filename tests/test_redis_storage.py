@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from redis.asyncio.client import Redis
+
+from cachepot.storages.redis import RedisStorage, ReadStrategy
+
+
+def make_client(data):
+    client = Redis()
+    client.get = AsyncMock(side_effect=lambda key: data.get(key))
+    client.mget = AsyncMock(side_effect=lambda keys: [data.get(key) for key in keys])
+    client.set = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replicas_round_robin():
+    primary = make_client({'key': b'primary'})
+    replicas = [make_client({'key': b'replica0'}), make_client({'key': b'replica1'})]
+    storage = RedisStorage(primary, replicas=replicas)
+
+    assert [await storage.get('key') for _ in range(3)] == [b'replica0', b'replica1', b'replica0']
+    await storage.set('key', b'value')
+
+    primary.set.assert_awaited_once()
+    primary.get.assert_not_called()
+    primary.mget.assert_not_called()
+    assert not any(replica.set.called for replica in replicas)
+
+
+@pytest.mark.asyncio
+async def test_lowest_latency_strategy():
+    replicas = [make_client({'key': b'replica0'}), make_client({'key': b'replica1'})]
+    storage = RedisStorage(make_client({}), replicas=replicas, read_strategy=ReadStrategy.LOWEST_LATENCY)
+    storage.latencies = [0.5, 0.1]
+
+    assert await storage.get('key') == b'replica1'
+
+
+@pytest.mark.asyncio
+async def test_fallback_to_primary():
+    primary = make_client({'key': b'primary', 'other': b'other'})
+    replica = make_client({'other': b'replica'})
+
+    storage = RedisStorage(primary, replicas=[replica])
+    assert await storage.get_many(['key', 'other']) == [None, b'replica']
+
+    storage = RedisStorage(primary, replicas=[replica], fallback_to_primary=True)
+    assert await storage.get_many(['key', 'other']) == [b'primary', b'replica']
+    primary.mget.assert_awaited_once_with(['key'])
+
+    replica.mget.side_effect = ConnectionError
+    assert await storage.get('other') == b'other'
+
+
+@pytest.mark.asyncio
+async def test_failed_replica_recovers(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr('cachepot.storages.redis.monotonic', lambda: now[0])
+    replicas = [make_client({'key': b'replica0'}), make_client({'key': b'replica1'})]
+    storage = RedisStorage(
+        make_client({'key': b'primary'}), replicas=replicas, read_strategy=ReadStrategy.LOWEST_LATENCY
+    )
+
+    replicas[0].mget.side_effect = ConnectionError
+    assert await storage.get('key') == b'primary'
+    replicas[0].mget.side_effect = lambda keys: [b'replica0' for _ in keys]
+    assert await storage.get('key') == b'replica1'  # replica0 is out of rotation
+
+    now[0] = storage.replica_down_time
+    assert await storage.get('key') == b'replica0'
+    assert all(latency == latency and latency < float('inf') for latency in storage.latencies)
+
+
+@pytest.mark.asyncio
+async def test_get_with_reference_reads_from_replicas():
+    primary = make_client({})
+    replica = make_client({'key': b'hash\n{}', 'body:hash': b'body'})
+    storage = RedisStorage(primary, replicas=[replica])
+
+    assert await storage.get_with_reference('key', 'body:') == (b'hash\n{}', b'body')
+    primary.mget.assert_not_called()
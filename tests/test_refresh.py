@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from fastapi.requests import Request
+from fastapi.testclient import TestClient
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import CachePolicy
+from cachepot.refresh import RefreshAhead, TokenBucket
+from tests.fakes import FakeStorage
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('cachepot.refresh.monotonic', clock)
+    return clock
+
+
+def make_app(refresher: RefreshAhead):
+    app = CachedFastAPI()
+    storage = FakeStorage()
+    calls = []
+    policy = CachePolicy(storage=storage, key=lambda request: str(request.url), ttl=60, refresh_ahead=refresher)
+
+    @app.get('/items/{item_id}', cache_policy=policy)
+    def get_item(item_id: int):
+        calls.append(item_id)
+        return {'id': item_id, 'version': len(calls)}
+
+    return app, storage, calls
+
+
+def test_token_bucket(clock):
+    bucket = TokenBucket(rate=2)
+    assert [bucket.take() for _ in range(3)] == [True, True, False]
+    clock.now += 0.5
+    assert bucket.take()
+
+
+@pytest.mark.asyncio
+async def test_refreshes_popular_keys_before_expiry(clock):
+    refresher = RefreshAhead(min_hits=2, lead_time=5, jitter=0)
+    app, storage, calls = make_app(refresher)
+    client = TestClient(app)
+    for _ in range(3):
+        client.get('/items/1')
+    client.get('/items/2')
+    assert calls == [1, 2]
+
+    clock.now = 54
+    assert refresher.refresh_due(app) == 0
+    clock.now = 55
+    assert refresher.refresh_due(app) == 1
+    await asyncio.gather(*refresher._tasks)
+
+    assert calls == [1, 2, 1]
+    assert refresher.refreshed == 1
+    assert client.get('/items/1').json() == {'id': 1, 'version': 3}
+    # the unpopular key is no longer tracked and the refreshed one starts a new window
+    clock.now = 200
+    assert refresher.refresh_due(app) == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_rate_limit(clock):
+    refresher = RefreshAhead(min_hits=1, lead_time=5, jitter=0, rate=1)
+    app, storage, calls = make_app(refresher)
+    client = TestClient(app)
+    for item_id in (1, 2):
+        client.get(f'/items/{item_id}')
+        client.get(f'/items/{item_id}')
+
+    clock.now = 60
+    assert refresher.refresh_due(app) == 1
+    assert refresher.refresh_due(app) == 0
+    clock.now = 61
+    assert refresher.refresh_due(app) == 1
+    await asyncio.gather(*refresher._tasks)
+    assert sorted(calls) == [1, 1, 2, 2]
+
+
+def test_replays_only_allowed_headers():
+    refresher = RefreshAhead(headers=('accept-language', 'x-tenant'))
+    request = Request(scope={'type': 'http', 'method': 'GET', 'path': '/items', 'headers': [
+        (b'host', b'test'),
+        (b'accept-language', b'fr'),
+        (b'x-tenant', b'a'),
+        (b'authorization', b'Bearer secret'),
+        (b'cookie', b'session=1'),
+        (b'if-none-match', b'"etag"'),
+        (b'range', b'bytes=0-1'),
+    ]})
+
+    refresher.record_store('key', request, ttl=60)
+
+    assert refresher._tracked['key'].headers == {'accept-language': 'fr', 'x-tenant': 'a'}
@@ -0,0 +1,105 @@
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import CachePolicy
+from tests.fakes import FakeStorage
+
+
+def test_negative_caching_of_http_exception():
+    app = CachedFastAPI()
+    storage = FakeStorage()
+    calls = []
+
+    @app.get('/items/{item_id}', cache_policy=CachePolicy(storage=storage, key=lambda request: request.url.path))
+    def get_item(item_id: int):
+        calls.append(item_id)
+        raise HTTPException(status_code=404, detail='Item not found')
+
+    client = TestClient(app)
+    for cache_hit in ('false', 'true'):
+        response = client.get('/items/1')
+        assert response.status_code == 404
+        assert response.json() == {'detail': 'Item not found'}
+        assert response.headers['x-cache-hit'] == cache_hit
+
+    assert calls == [1]
+    assert storage.data['/items/1'][1] == 5
+
+
+def test_negative_caching_uses_app_exception_handler():
+    app = CachedFastAPI()
+
+    @app.exception_handler(404)
+    async def not_found(request, exc):
+        return PlainTextResponse('custom 404', status_code=404)
+
+    @app.get('/items/{item_id}', cache_policy=CachePolicy(storage=FakeStorage(), key=lambda request: request.url.path))
+    def get_item(item_id: int):
+        raise HTTPException(status_code=404)
+
+    client = TestClient(app)
+    for cache_hit in ('false', 'true'):
+        response = client.get('/items/1')
+        assert response.status_code == 404
+        assert response.text == 'custom 404'
+        assert response.headers['x-cache-hit'] == cache_hit
+
+
+def test_error_responses_are_not_cached():
+    app = CachedFastAPI()
+    storage = FakeStorage()
+
+    @app.get('/', cache_policy=CachePolicy(storage=storage, key='test'))
+    def fail():
+        raise HTTPException(status_code=503)
+
+    response = TestClient(app).get('/')
+    assert response.status_code == 503
+    assert 'x-cache-hit' not in response.headers
+    assert storage.data == {}
+
+
+def test_range_request_served_from_cache():
+    app = CachedFastAPI()
+
+    @app.get('/', cache_policy=CachePolicy(storage=FakeStorage(), key='test', serve_ranges=True))
+    def artifact():
+        return 'x' * 100
+
+    client = TestClient(app)
+    assert client.get('/', headers={'range': 'bytes=0-9'}).status_code == 200  # the first request is a miss
+
+    response = client.get('/', headers={'range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.content == b'"xxxxxxxxx'
+    assert response.headers['content-range'] == 'bytes 0-9/102'
+
+
+def test_post_cached_on_canonical_body():
+    app = CachedFastAPI()
+    storage = FakeStorage()
+    calls = []
+
+    @app.post('/search', cache_policy=CachePolicy(storage=storage, key='search', methods=frozenset({'POST'})))
+    def search(query: dict):
+        calls.append(query)
+        return {'results': []}
+
+    client = TestClient(app)
+    assert client.post('/search', content='{"q": "cat", "page": 1}').headers['x-cache-hit'] == 'false'
+    assert client.post('/search', content='{"page":1,  "q":"cat"}').headers['x-cache-hit'] == 'true'
+    assert client.post('/search', json={'q': 'dog', 'page': 1}).headers['x-cache-hit'] == 'false'
+    assert len(calls) == 2
+    assert all(key.startswith('search:/search:') for key in storage.data)
+
+
+def test_post_not_cached_by_default():
+    app = CachedFastAPI()
+
+    @app.post('/search', cache_policy=CachePolicy(storage=FakeStorage(), key='search'))
+    def search(query: dict):
+        return {'results': []}
+
+    assert 'x-cache-hit' not in TestClient(app).post('/search', json={'q': 'cat'}).headers
@@ -0,0 +1,59 @@
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import CachePolicy
+from cachepot.encoders import ResponseEncoder
+from cachepot.shadow import ShadowStats
+from tests.fakes import FakeStorage
+
+
+def make_app(stats: ShadowStats):
+    app = CachedFastAPI()
+    storage = FakeStorage()
+    versions = {}
+
+    @app.get('/items/{item_id}', cache_policy=CachePolicy(storage=storage, key=lambda r: r.url.path, shadow=stats))
+    def get_item(item_id: int):
+        return {'id': item_id, 'version': versions.get(item_id, 0)}
+
+    return TestClient(app), storage, versions
+
+
+def test_shadow_mode_serves_fresh_responses_and_records_stats():
+    stats = ShadowStats()
+    client, storage, versions = make_app(stats)
+
+    with patch.object(storage, 'set', wraps=storage.set) as mock_set:
+        client.get('/items/1')
+        client.get('/items/1')
+        versions[1] = 1
+        response = client.get('/items/1')
+        client.get('/items/2')
+
+    assert response.json() == {'id': 1, 'version': 1}
+    assert 'x-cache-hit' not in response.headers
+    assert set(storage.data) == {'/items/1', '/items/2'}
+    # hits don't rewrite the entry, so it keeps the content and expiry the policy would have served
+    assert [call.kwargs['key'] for call in mock_set.call_args_list] == ['/items/1', '/items/2']
+    assert json.loads(ResponseEncoder.model_validate_json(storage.data['/items/1'][0]).body)['version'] == 0
+    assert (stats.lookups, stats.hits, stats.stale) == (4, 2, 1)
+    assert stats.hit_ratio == 0.5
+    assert stats.staleness_rate == 0.5
+    assert stats.latency_saved > 0
+
+
+def test_shadow_sampling_is_per_key():
+    stats = ShadowStats(sample_rate=0.5)
+    client, storage, _ = make_app(stats)
+    paths = [f'/items/{i}' for i in range(100)]
+    for path in paths * 2:
+        client.get(path)
+
+    sampled = [path for path in paths if stats.sampled(path)]
+    assert 20 < len(sampled) < 80
+    assert set(storage.data) == set(sampled)
+    assert stats.lookups == 2 * len(sampled)
+    assert stats.hits == len(sampled)
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+import pytest
+
+from cachepot.storages.memory import MemoryStorage
+from cachepot.storages.sharded import HashRing, ShardedStorage
+
+
+def test_hash_ring_moves_only_keys_of_new_node():
+    ring = HashRing({f'node{i}': i for i in range(4)})
+    keys = [f'key{i}' for i in range(10000)]
+    before = {key: ring.get_name(key) for key in keys}
+    assert set(before.values()) == {'node0', 'node1', 'node2', 'node3'}
+
+    ring.add_node('node4', 4)
+    moved = [key for key in keys if ring.get_name(key) != before[key]]
+    assert all(ring.get_name(key) == 'node4' for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+    ring.remove_node('node4')
+    assert {key: ring.get_name(key) for key in keys} == before
+
+
+@pytest.mark.asyncio
+async def test_sharded_storage():
+    shards = {f'shard{i}': MemoryStorage() for i in range(3)}
+    storage = ShardedStorage(shards)
+    items = {f'key{i}': f'value{i}'.encode() for i in range(30)}
+
+    assert await storage.set_many(items, expire=10)
+    assert sum(len(shard) for shard in shards.values()) == 30
+    assert all(len(shard) for shard in shards.values())
+    assert await storage.get('key1') == b'value1'
+
+    with patch.object(MemoryStorage, 'get_many', autospec=True, side_effect=MemoryStorage.get_many) as get_many:
+        values = await storage.get_many(['key3', 'missing', 'key1', 'key2'])
+    assert values == [b'value3', None, b'value1', b'value2']
+    assert get_many.call_count == len({storage.ring.get_name(key) for key in ('key3', 'missing', 'key1', 'key2')})
+
+    assert await storage.delete_many(['key1', 'key2', 'missing']) == 2
+    assert await storage.get('key1') is None
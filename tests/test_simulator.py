@@ -0,0 +1,102 @@
+import io
+
+import pytest
+
+from cachepot.constants import CachePolicy
+from cachepot.simulator import SimulationConfig, SkippedLines, main, parse_size, read_log, simulate
+from cachepot.storages.dummy import DummyStorage
+
+LOG = """\
+# timestamp method path query size
+0 GET /a - 100
+1 GET /a - 100
+2 GET /b page=1 50
+3 POST /a - 10
+40 GET /a - 100
+2024-01-01T00:00:00+00:00 GET /c - 10
+"""
+
+
+def path_key(request):
+    return request.url.path
+
+
+@pytest.fixture
+def policy():
+    return CachePolicy(storage=DummyStorage(), key=path_key)
+
+
+def test_read_log():
+    records = list(read_log(io.StringIO(LOG)))
+    assert len(records) == 6
+    assert records[2].query == 'page=1'
+    assert records[5].timestamp == 1704067200.0
+
+
+def test_read_log_skips_malformed_lines():
+    skipped = SkippedLines(keep=2)
+    log = '0 GET /a - 100\n1 GET /a\nyesterday GET /a - 100\n3 GET /a - big\n4 GET /b - 10\n'
+
+    records = list(read_log(io.StringIO(log), skipped))
+
+    assert [record.path for record in records] == ['/a', '/b']
+    assert (skipped.count, skipped.first) == (3, [2, 3])
+    assert str(skipped) == 'skipped 3 malformed lines (2, 3, ...)'
+
+
+@pytest.mark.parametrize('value, expected', [('512', 512), ('64K', 65536), ('1.5M', 1572864), ('inf', None)])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def test_simulate_ttl(policy):
+    short, long = simulate(read_log(io.StringIO(LOG)), policy, [SimulationConfig(ttl=30), SimulationConfig(ttl=60)])
+
+    assert (short.requests, short.hits, short.origin_requests) == (6, 1, 5)
+    assert (long.hits, long.origin_requests) == (2, 4)
+    assert long.origin_bytes == 100 + 50 + 10 + 10
+
+
+@pytest.mark.parametrize('eviction', ['lru', 'lfu', 'gds', 'fifo'])
+def test_simulate_capacity(policy, eviction):
+    config = SimulationConfig(ttl=None, capacity=110, eviction=eviction)
+    (result,) = simulate(read_log(io.StringIO(LOG)), policy, [config])
+
+    assert result.peak_memory <= 110
+    assert result.evictions > 0
+
+
+def test_lru_and_fifo_differ(policy):
+    log = '0 GET /a - 10\n1 GET /b - 10\n2 GET /a - 10\n3 GET /c - 10\n4 GET /a - 10\n'
+    lru, fifo = simulate(
+        read_log(io.StringIO(log)),
+        policy,
+        [
+            SimulationConfig(ttl=None, capacity=24, eviction='lru'),
+            SimulationConfig(ttl=None, capacity=24, eviction='fifo'),
+        ],
+    )
+    assert lru.hits == 2
+    assert fifo.hits == 1
+
+
+def test_main(tmp_path):
+    path = tmp_path / 'access.log'
+    path.write_text(LOG)
+    output = io.StringIO()
+
+    main([str(path), '--ttl', '30', '60', '--capacity', '1K', '--eviction', 'lru', 'gds'], output=output)
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 5
+    assert 'hit ratio' in lines[0]
+
+
+def test_main_reports_malformed_lines(tmp_path):
+    path = tmp_path / 'access.log'
+    path.write_text(LOG + 'garbage\n')
+    output = io.StringIO()
+
+    main([str(path)], output=output)
+
+    assert output.getvalue().splitlines()[-1] == 'skipped 1 malformed lines (8)'
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import struct
+import time
+
+import pytest
+
+from cachepot.snapshot import MAGIC, load_snapshot, persist_snapshot, save_snapshot
+from cachepot.storages.memory import MemoryStorage
+
+
+@pytest.mark.asyncio
+async def test_snapshot_roundtrip(tmp_path, monkeypatch):
+    path = tmp_path / 'cache.snapshot'
+    storage = MemoryStorage()
+    await storage.set('forever', b'1')
+    await storage.set('short', b'2', expire=10)
+    await storage.set('long', b'3' * 1000, expire=100)
+
+    assert await save_snapshot(storage, path) == 3
+
+    later = time.time() + 50
+    monkeypatch.setattr('cachepot.snapshot.time.time', lambda: later)
+    restored = MemoryStorage()
+    await restored.set('long', b'newer')
+    assert await load_snapshot(restored, path, batch_size=1) == 1
+
+    assert await restored.get('forever') == b'1'
+    assert await restored.get('short') is None
+    assert await restored.get('long') == b'newer'
+
+
+@pytest.mark.asyncio
+async def test_load_missing_or_truncated_snapshot(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    assert await load_snapshot(MemoryStorage(), path) == 0
+
+    storage = MemoryStorage()
+    await storage.set('a', b'1' * 100)
+    await storage.set('b', b'2' * 100)
+    await save_snapshot(storage, path)
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert await load_snapshot(MemoryStorage(), path) == 1
+
+
+@pytest.mark.asyncio
+async def test_load_corrupt_snapshot(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    storage = MemoryStorage()
+    await storage.set('a', b'1')
+    await save_snapshot(storage, path)
+    path.write_bytes(path.read_bytes() + struct.pack('>IIdd', 2, 1, -1.0, 0.0) + b'\xff\xfe2')
+
+    assert await load_snapshot(MemoryStorage(), path) == 1
+    path.write_bytes(MAGIC + struct.pack('>IIdd', 10, 0, -1.0, 0.0) + b'ab')  # short key
+    assert await load_snapshot(MemoryStorage(), path) == 0
+
+
+@pytest.mark.asyncio
+async def test_save_snapshot_leaves_no_temporary_file(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    storage = MemoryStorage()
+    await storage.set('a', b'1')
+
+    await asyncio.gather(*(save_snapshot(storage, path) for _ in range(3)))
+
+    assert os.listdir(tmp_path) == ['cache.snapshot']
+    assert await load_snapshot(MemoryStorage(), path) == 1
+
+
+@pytest.mark.asyncio
+async def test_persist_snapshot(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    storage = MemoryStorage()
+    async with persist_snapshot(storage, path) as loading:
+        assert await loading == 0
+        await storage.set('key', b'value', expire=60)
+
+    restored = MemoryStorage()
+    async with persist_snapshot(restored, path, background=False) as loading:
+        assert loading.result() == 1
+        assert await restored.get('key') == b'value'
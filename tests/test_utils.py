@@ -1,13 +1,21 @@
+import asyncio
+import gc
+import time
+import weakref
 from unittest.mock import patch
 
 import pytest
 from fastapi.requests import Request
+from fastapi.responses import Response
 from starlette.datastructures import MutableHeaders
 
-from cachepot.constants import CachePolicy
-from cachepot.encoders import ResponseEncoder
+from cachepot.breaker import CircuitBreaker, BreakerState
+from cachepot.constants import CachePolicy, AdaptiveTTL, HTTPCacheHeaders
+from cachepot.encoders import ResponseEncoder, content_hash
 from cachepot.storages.dummy import DummyStorage
-from cachepot.utils import is_cachable, get_cached_response
+from cachepot.storages.memory import MemoryStorage
+from cachepot.utils import is_cachable, get_cached_response, cache_response, bump_namespace, _namespace_versions
+from tests.fakes import FakeStorage
 
 
 def test_is_cachable():
@@ -86,3 +94,246 @@ async def test_get_cached_response_no_cache():
         )
 
         assert response is None
+
+
+@pytest.mark.asyncio
+async def test_cache_response_adaptive_ttl():
+    storage = FakeStorage()
+    policy = CachePolicy(storage=storage, key='test', ttl=10, adaptive_ttl=AdaptiveTTL(min_ttl=5, max_ttl=30))
+    request = Request(scope={'type': 'http', 'method': 'GET', 'headers': []})
+
+    ttls = []
+    for body in (b'a', b'a', b'a', b'b', b'b'):
+        await cache_response(request=request, response=Response(content=body), cache_policy=policy)
+        ttls.append(storage.data['test'][1])
+
+    assert ttls == [10, 20, 30, 15, 30]
+
+
+@pytest.mark.parametrize(
+    'status_code, content, expire',
+    (
+        (200, b'{"hello": "world"}', 30),
+        (200, b'[]', 5),  # empty result => negative ttl
+        (404, b'{"detail": "Not Found"}', 5),
+        (500, b'{"detail": "Internal Server Error"}', None),  # errors are never cached
+        (302, b'', None),
+        (204, b'', 30),  # bodiless by design, not an empty result
+        (301, b'', 30),
+    )
+)
+@pytest.mark.asyncio
+async def test_cache_response_status_rules(status_code: int, content: bytes, expire):
+    storage = FakeStorage()
+    await cache_response(
+        request=Request(scope={'type': 'http', 'method': 'GET', 'headers': []}),
+        response=Response(content=content, status_code=status_code),
+        cache_policy=CachePolicy(storage=storage, key='test'),
+    )
+
+    if expire is None:
+        assert storage.data == {}
+    else:
+        assert storage.data['test'][1] == expire
+
+
+@pytest.mark.asyncio
+async def test_get_cached_response_storage_timeout():
+    async def stalled_get(key):
+        await asyncio.sleep(1)
+
+    breaker = CircuitBreaker(window=2, min_calls=2)
+    policy = CachePolicy(storage=FakeStorage(), key='test', storage_timeout=0.01, circuit_breaker=breaker)
+    with patch.object(policy.storage, 'get', side_effect=stalled_get) as mock_get:
+        for _ in range(3):
+            response = await get_cached_response(
+                request=Request(scope={'type': 'http', 'method': 'GET', 'headers': []}),
+                cache_policy=policy,
+            )
+            assert response is None
+
+    assert mock_get.call_count == 2  # the storage is bypassed once the breaker opens
+    assert breaker.state == BreakerState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_does_not_wedge_breaker():
+    breaker = CircuitBreaker(cooldown=0)
+    breaker._open()
+    policy = CachePolicy(storage=FakeStorage(), key='test', circuit_breaker=breaker)
+    request = Request(scope={'type': 'http', 'method': 'GET', 'headers': []})
+
+    async def stalled_get(key):
+        await asyncio.sleep(1)
+
+    with patch.object(policy.storage, 'get', side_effect=stalled_get):
+        probe = asyncio.ensure_future(get_cached_response(request=request, cache_policy=policy))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    assert breaker.allow()  # the next call probes again
+
+
+@pytest.mark.parametrize(
+    'http_cache, cache_control',
+    (
+        (HTTPCacheHeaders(), 'public, max-age=20, s-maxage=20'),
+        (HTTPCacheHeaders(max_age=5), 'public, max-age=5, s-maxage=20'),
+        (HTTPCacheHeaders(private=True, shared_max_age=5), 'private, max-age=20'),
+    )
+)
+@pytest.mark.asyncio
+async def test_get_cached_response_freshness_headers(http_cache: HTTPCacheHeaders, cache_control: str):
+    storage = FakeStorage()
+    await storage.set('test', ResponseEncoder(
+        body=b'{}', status_code=200, headers=MutableHeaders(), stored_at=time.time() - 10, ttl=30,
+    ).cache_data())
+
+    response = await get_cached_response(
+        request=Request(scope={'type': 'http', 'method': 'GET', 'headers': []}),
+        cache_policy=CachePolicy(storage=storage, key='test', http_cache=http_cache),
+    )
+
+    assert response.headers['age'] == '10'
+    assert response.headers['cache-control'] == cache_control
+    assert 'expires' in response.headers
+
+
+@pytest.mark.asyncio
+async def test_cache_response_freshness_headers():
+    response = await cache_response(
+        request=Request(scope={'type': 'http', 'method': 'GET', 'headers': []}),
+        response=Response(content=b'{"hello": "world"}'),
+        cache_policy=CachePolicy(storage=FakeStorage(), key='test', http_cache=HTTPCacheHeaders()),
+    )
+
+    assert response.headers['cache-control'] == 'public, max-age=30, s-maxage=30'
+    assert 'age' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_namespace_bump_invalidates_entries():
+    storage = FakeStorage()
+    tenant_policy = CachePolicy(storage=storage, key='test', namespace=lambda request: request.headers['x-tenant'])
+    requests = {
+        tenant: Request(scope={'type': 'http', 'method': 'GET', 'headers': [(b'x-tenant', tenant.encode())]})
+        for tenant in ('a', 'b')
+    }
+    for request in requests.values():
+        await cache_response(request=request, response=Response(content=b'{}'), cache_policy=tenant_policy)
+        assert await get_cached_response(request=requests['a'], cache_policy=tenant_policy)
+
+    with patch.object(storage, 'set', wraps=storage.set) as mock_set:
+        await bump_namespace(tenant_policy, 'a')
+    assert mock_set.call_count == 1
+
+    assert await get_cached_response(request=requests['a'], cache_policy=tenant_policy) is None
+    assert await get_cached_response(request=requests['b'], cache_policy=tenant_policy)
+
+
+@pytest.mark.asyncio
+async def test_failed_namespace_read_skips_the_cache_instead_of_resetting_the_version():
+    storage = FakeStorage()
+    policy = CachePolicy(
+        storage=storage, key='test', namespace='failing', namespace_cache_ttl=0, storage_timeout=0.01
+    )
+    request = Request(scope={'type': 'http', 'method': 'GET', 'headers': []})
+    await cache_response(request=request, response=Response(content=b'{"a": 1}'), cache_policy=policy)
+    version = storage.data['cachepot:namespace:failing'][0]
+
+    async def stalled_get(key):
+        await asyncio.sleep(1)
+
+    with patch.object(storage, 'get', side_effect=stalled_get), patch.object(storage, 'set') as mock_set:
+        assert await get_cached_response(request=request, cache_policy=policy) is None
+        await cache_response(request=request, response=Response(content=b'{"a": 2}'), cache_policy=policy)
+    mock_set.assert_not_called()
+
+    assert storage.data['cachepot:namespace:failing'][0] == version
+    assert (await get_cached_response(request=request, cache_policy=policy)).body == b'{"a": 1}'
+
+
+@pytest.mark.asyncio
+async def test_namespace_version_is_cached_in_process():
+    storage = FakeStorage()
+    policy = CachePolicy(storage=storage, key='test', namespace='items', namespace_cache_ttl=60)
+    request = Request(scope={'type': 'http', 'method': 'GET', 'headers': []})
+    await cache_response(request=request, response=Response(content=b'{}'), cache_policy=policy)
+
+    with patch.object(storage, 'get', wraps=storage.get) as mock_get:
+        await get_cached_response(request=request, cache_policy=policy)
+    mock_get.assert_called_once()  # the entry only, not the namespace version
+
+
+@pytest.mark.asyncio
+async def test_namespace_version_cache_is_bounded_per_storage(monkeypatch):
+    monkeypatch.setattr('cachepot.utils.NAMESPACE_CACHE_SIZE', 2)
+    storage = FakeStorage()
+    policy = CachePolicy(
+        storage=storage, key='test', namespace=lambda request: request.headers['x-tenant'], namespace_cache_ttl=60
+    )
+    for tenant in ('a', 'b', 'c'):
+        request = Request(scope={'type': 'http', 'method': 'GET', 'headers': [(b'x-tenant', tenant.encode())]})
+        await get_cached_response(request=request, cache_policy=policy)
+
+    assert list(_namespace_versions[storage]) == ['b', 'c']
+    storage_ref = weakref.ref(storage)
+    del policy, storage
+    gc.collect()
+    assert storage_ref() is None  # the cache doesn't keep storages alive, their versions go with them
+
+
+@pytest.mark.asyncio
+async def test_cache_response_touches_unchanged_content():
+    storage = FakeStorage()
+    policy = CachePolicy(storage=storage, key='test', touch_unchanged=True)
+    request = Request(scope={'type': 'http', 'method': 'GET', 'headers': []})
+
+    with patch.object(storage, 'get', wraps=storage.get) as mock_get, \
+            patch.object(storage, 'set_many', wraps=storage.set_many) as mock_set_many, \
+            patch.object(storage, 'touch', wraps=storage.touch) as mock_touch:
+        for body in (b'a', b'a', b'b'):
+            await cache_response(request=request, response=Response(content=body), cache_policy=policy)
+
+    assert [call.args[0] for call in mock_get.call_args_list] == ['test:hash'] * 3  # never the entry itself
+    assert [list(call.args[0]) for call in mock_set_many.call_args_list] == [['test', 'test:hash']] * 2
+    assert [call.args[0] for call in mock_touch.call_args_list] == ['test', 'test:hash']
+    assert ResponseEncoder.model_validate_json(storage.data['test'][0]).body == b'b'
+
+
+@pytest.mark.asyncio
+async def test_touch_unchanged_adds_no_round_trip_to_misses():
+    storage = FakeStorage()
+    policy = CachePolicy(storage=storage, key='test', touch_unchanged=True)
+    request = Request(scope={'type': 'http', 'method': 'GET', 'headers': []})
+
+    with patch.object(storage, 'get', wraps=storage.get) as mock_get, \
+            patch.object(storage, 'set_many', wraps=storage.set_many) as mock_set_many:
+        assert await get_cached_response(request=request, cache_policy=policy) is None
+        await cache_response(request=request, response=Response(content=b'a'), cache_policy=policy)
+    mock_get.assert_called_once()  # the lookup only, the entry is known to be absent
+    mock_set_many.assert_called_once()  # the entry and its hash in a single write
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_bodies():
+    storage = MemoryStorage()
+    policy = CachePolicy(storage=storage, key=lambda request: request.url.path, deduplicate_bodies=True)
+    requests = [
+        Request(scope={'type': 'http', 'method': 'GET', 'path': path, 'headers': [(b'host', b'test')]})
+        for path in ('/a', '/b')
+    ]
+    for request in requests:
+        await cache_response(request=request, response=Response(content=b'x' * 1000), cache_policy=policy)
+
+    assert len(storage) == 3  # two pointer records and a single body
+    assert storage.size < 2000
+    for request in requests:
+        response = await get_cached_response(request=request, cache_policy=policy)
+        assert response.body == b'x' * 1000
+        assert response.headers['content-length'] == '1000'
+
+    await storage.delete(f'cachepot:body:{content_hash(b"x" * 1000)}')
+    assert await get_cached_response(request=requests[0], cache_policy=policy) is None
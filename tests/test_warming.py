@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+
+from cachepot.app import CachedFastAPI
+from cachepot.constants import CachePolicy
+from cachepot.warming import warm_cache
+from tests.fakes import FakeStorage
+
+
+def make_app(storage: FakeStorage) -> CachedFastAPI:
+    app = CachedFastAPI()
+    policy = CachePolicy(storage=storage, key=lambda request: request.url.path)
+
+    @app.get('/items/{item_id}', cache_policy=policy)
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=503)
+        return {'id': item_id}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_warm_cache():
+    storage = FakeStorage()
+    progress = []
+
+    report = await warm_cache(
+        make_app(storage),
+        (f'/items/{i}' for i in range(4)),
+        concurrency=2,
+        on_progress=lambda url, status_code, error: progress.append((url, status_code)),
+    )
+
+    assert report.total == 4
+    assert report.succeeded == 3
+    assert report.failed == [('/items/0', 'status 503')]
+    assert sorted(progress) == [('/items/0', 503), ('/items/1', 200), ('/items/2', 200), ('/items/3', 200)]
+    assert sorted(storage.data) == ['/items/1', '/items/2', '/items/3']
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_async_iterable():
+    storage = FakeStorage()
+
+    async def urls():
+        yield '/items/1?lang=en'
+        yield '/items/2'
+
+    report = await warm_cache(make_app(storage), urls())
+
+    assert report.total == report.succeeded == 2
+    assert sorted(storage.data) == ['/items/1', '/items/2']